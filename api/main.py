@@ -5,10 +5,13 @@ Provides REST API for cats vs dogs image classification
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import JSONResponse, FileResponse, HTMLResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 import numpy as np
 import time
 import logging
+import asyncio
+from collections import deque
+from functools import lru_cache
 from datetime import datetime
 from typing import List, Optional, Union
 import os
@@ -16,10 +19,14 @@ import base64
 import binascii
 import io
 from PIL import Image
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import (
+    Counter, Histogram, CollectorRegistry, generate_latest, CONTENT_TYPE_LATEST,
+    REGISTRY, PROCESS_COLLECTOR, PLATFORM_COLLECTOR, GC_COLLECTOR, multiprocess
+)
 from fastapi.responses import Response
 import json
 from src.inference import ModelInference
+from src.data_preprocessing import ReducingResize
 
 # Configure logging
 logging.basicConfig(
@@ -40,6 +47,17 @@ static_dir = os.path.join(os.path.dirname(__file__), "static")
 if os.path.exists(static_dir):
     app.mount("/static", StaticFiles(directory=static_dir), name="static")
 
+# Dashboard page is immutable, so read it once instead of on every request
+index_html_path = os.path.join(static_dir, "index.html")
+INDEX_HTML = None
+if os.path.exists(index_html_path):
+    with open(index_html_path, "rb") as f:
+        INDEX_HTML = f.read()
+
+# Model location and on-disk size don't change while the process is running
+MODEL_PATH = os.getenv('MODEL_PATH', 'models/cat_dogs_cnn_model.pt')
+MODEL_SIZE_MB = os.path.getsize(MODEL_PATH) / (1024 * 1024) if os.path.exists(MODEL_PATH) else None
+
 # Store start time for uptime calculation
 START_TIME = datetime.utcnow()
 
@@ -59,33 +77,156 @@ PREDICTION_COUNT = Counter(
     'Total predictions made',
     ['predicted_class']
 )
+CONFIDENCE_SUM = Counter(
+    'prediction_confidence_sum',
+    'Sum of confidence scores over all predictions'
+)
+INFERENCE_TIME_SUM = Counter(
+    'prediction_inference_time_ms_sum',
+    'Sum of inference times over all predictions in milliseconds'
+)
+
+# Children for the known classes (0=CAT, 1=DOG) are resolved once so the hot
+# path skips the label lookup and str() conversion
+PREDICTION_COUNT_BY_CLASS = {
+    predicted_class: PREDICTION_COUNT.labels(predicted_class=str(predicted_class))
+    for predicted_class in range(2)
+}
+
+
+@lru_cache(maxsize=256)
+def request_count_child(endpoint, method, status):
+    """Return the cached REQUEST_COUNT child for a label combination"""
+    return REQUEST_COUNT.labels(endpoint=endpoint, method=method, status=status)
+
+
+@lru_cache(maxsize=256)
+def request_latency_child(endpoint):
+    """Return the cached REQUEST_LATENCY child for an endpoint"""
+    return REQUEST_LATENCY.labels(endpoint=endpoint)
+
+
+def record_prediction_metrics(prediction, confidence, inference_time_ms):
+    """Update Prometheus metrics for one prediction"""
+    counter = PREDICTION_COUNT_BY_CLASS.get(prediction)
+    if counter is None:
+        counter = PREDICTION_COUNT.labels(predicted_class=str(prediction))
+    counter.inc()
+    CONFIDENCE_SUM.inc(confidence)
+    INFERENCE_TIME_SUM.inc(inference_time_ms)
+
+# Registry served by /metrics. With several workers (PROMETHEUS_MULTIPROC_DIR
+# set before startup) each worker writes its samples to that directory and a
+# scrape aggregates them once, so the per-worker process/platform/GC
+# collectors, which would otherwise be read once per worker, are dropped.
+if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+    for collector in (PROCESS_COLLECTOR, PLATFORM_COLLECTOR, GC_COLLECTOR):
+        try:
+            REGISTRY.unregister(collector)
+        except KeyError:
+            pass
+    METRICS_REGISTRY = CollectorRegistry()
+    multiprocess.MultiProcessCollector(METRICS_REGISTRY)
+else:
+    METRICS_REGISTRY = REGISTRY
+
+# Rendered /metrics output is reused for this many seconds (0 disables caching)
+METRICS_CACHE_TTL = float(os.getenv('METRICS_CACHE_TTL', '1.0'))
+metrics_cache = {"generated_at": float("-inf"), "body": b""}
+metrics_cache_lock = None
 
 # Global model instance
 model_inference = None
+# Parameter counts and file size for /model-info, filled in when the model loads
+model_summary = None
+
+# Prediction log: requests append to an in-memory ring buffer and a
+# background task drains it to disk in batches
+PREDICTION_LOG_FILE = os.path.join("logs", "predictions.jsonl")
+PREDICTION_LOG_FLUSH_INTERVAL = 0.5
+prediction_log_buffer = deque(maxlen=8192)
+prediction_log_flusher = None
+
+# Binary layout accepted by /predict-raw (float32 values in [0, 1])
+RAW_IMAGE_SHAPE = (128, 128, 3)
+RAW_IMAGE_DTYPE = np.dtype('<f4')
+RAW_IMAGE_NBYTES = int(np.prod(RAW_IMAGE_SHAPE)) * RAW_IMAGE_DTYPE.itemsize
+
+# /predict-u8 takes the same layout as 8-bit pixels
+U8_IMAGE_NBYTES = int(np.prod(RAW_IMAGE_SHAPE))
+
+
+def check_image_shape(arr):
+    """
+    Validate that an array has one of the accepted /predict image shapes
+    
+    The model takes (128, 128, 3) RGB pixels in [0, 1]; the legacy (28, 28)
+    and (784,) layouts are still accepted by the schema.
+    
+    Args:
+        arr: float32 numpy array
+        
+    Returns:
+        The same array
+    """
+    if arr.shape in ((784,), (28, 28), RAW_IMAGE_SHAPE):
+        # Hand the converted array on so the endpoint does not rebuild it
+        return arr
+    else:
+        raise ValueError(
+            f"Image must be {RAW_IMAGE_SHAPE}, (28, 28) or (784,) shape, got {arr.shape}"
+        )
 
 
 class PredictionRequest(BaseModel):
     """Request model for prediction endpoint"""
-    image: Union[List[float], List[List[float]]] = Field(
-        ..., 
-        description="28x28 image as 2D array or 784-element flattened array"
+    image: Optional[Union[List[float], List[List[float]], List[List[List[float]]]]] = Field(
+        None, 
+        description="128x128x3 RGB image with values in [0, 1] (legacy: 28x28 or 784 values)"
+    )
+    image_b64: Optional[str] = Field(
+        None,
+        description="Base64 encoded little-endian float32 pixel bytes, alternative to image"
     )
+    shape: Optional[List[int]] = Field(
+        None,
+        description="Shape of the image_b64 array (default: 128x128x3 when the size matches)"
+    )
+    dtype: str = Field("float32", description="Element type of the image_b64 array")
     
     @field_validator('image')
     @classmethod
     def validate_image(cls, v):
-        """Validate image dimensions"""
-        arr = np.array(v)
-        
-        # Check if flattened (784,) or 2D (28, 28)
-        if arr.shape == (784,):
-            return v
-        elif arr.shape == (28, 28):
+        """Validate image dimensions and convert to a float32 array"""
+        if v is None:
             return v
-        else:
-            raise ValueError(
-                f"Image must be either (28, 28) or (784,) shape, got {arr.shape}"
-            )
+        return check_image_shape(np.asarray(v, dtype=np.float32))
+    
+    @model_validator(mode='after')
+    def decode_image_b64(self):
+        """Decode image_b64 into image when the list form was not sent"""
+        if self.image is not None:
+            return self
+        if self.image_b64 is None:
+            raise ValueError("Either image or image_b64 must be provided")
+        if self.dtype != "float32":
+            raise ValueError(f"Only float32 image_b64 payloads are supported, got {self.dtype}")
+        try:
+            raw = base64.b64decode(self.image_b64, validate=True)
+        except binascii.Error as e:
+            raise ValueError(f"Invalid base64 image data: {e}")
+        if len(raw) % RAW_IMAGE_DTYPE.itemsize:
+            raise ValueError(f"image_b64 length {len(raw)} is not a whole number of float32 values")
+        arr = np.frombuffer(bytearray(raw), dtype=RAW_IMAGE_DTYPE)
+        if self.shape is not None:
+            try:
+                arr = arr.reshape(self.shape)
+            except ValueError:
+                raise ValueError(f"image_b64 has {arr.size} values, which does not match shape {self.shape}")
+        elif len(raw) == RAW_IMAGE_NBYTES:
+            arr = arr.reshape(RAW_IMAGE_SHAPE)
+        self.image = check_image_shape(arr)
+        return self
 
 
 class PredictionResponse(BaseModel):
@@ -107,13 +248,16 @@ class HealthResponse(BaseModel):
 @app.on_event("startup")
 async def load_model():
     """Load model on startup"""
-    global model_inference
+    global model_inference, model_summary
     
     try:
-        model_path = os.getenv('MODEL_PATH', 'models/cat_dogs_cnn_model.pt')
-        
-        logger.info(f"Loading model from {model_path}")
-        model_inference = ModelInference(model_path)
+        logger.info(f"Loading model from {MODEL_PATH}")
+        model_inference = ModelInference(
+            MODEL_PATH,
+            compile_model=os.getenv('TORCH_COMPILE') == '1',
+            quantize=os.getenv('QUANTIZE_MODEL') == '1'
+        )
+        model_summary = summarize_model(model_inference.model)
         logger.info("Model loaded successfully")
         
     except Exception as e:
@@ -121,13 +265,34 @@ async def load_model():
         logger.warning("API will start but predictions will fail until model is loaded")
 
 
+@app.on_event("startup")
+async def start_prediction_log_flusher():
+    """Start the background task that writes buffered predictions to disk"""
+    global prediction_log_flusher
+    prediction_log_flusher = asyncio.create_task(prediction_log_flush_loop())
+
+
+@app.on_event("shutdown")
+async def stop_prediction_log_flusher():
+    """Stop the flusher and write out any remaining buffered predictions"""
+    global prediction_log_flusher
+    if prediction_log_flusher is not None:
+        prediction_log_flusher.cancel()
+        try:
+            await prediction_log_flusher
+        except asyncio.CancelledError:
+            pass
+        prediction_log_flusher = None
+    flush_prediction_log()
+
+
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     """Middleware to log all requests and track metrics"""
     start_time = time.time()
     
     # Log request
-    logger.info(f"Request: {request.method} {request.url.path}")
+    logger.info("Request: %s %s", request.method, request.url.path)
     
     # Process request
     response = await call_next(request)
@@ -136,49 +301,29 @@ async def log_requests(request: Request, call_next):
     latency = time.time() - start_time
     
     # Record metrics
-    REQUEST_COUNT.labels(
-        endpoint=request.url.path,
-        method=request.method,
-        status=response.status_code
+    request_count_child(
+        request.url.path,
+        request.method,
+        response.status_code
     ).inc()
     
-    REQUEST_LATENCY.labels(
-        endpoint=request.url.path
-    ).observe(latency)
+    request_latency_child(request.url.path).observe(latency)
     
     # Log response
     logger.info(
-        f"Response: {request.method} {request.url.path} - "
-        f"Status: {response.status_code} - Latency: {latency:.3f}s"
+        "Response: %s %s - Status: %s - Latency: %.3fs",
+        request.method, request.url.path, response.status_code, latency
     )
     
     return response
 
 
 @app.get("/", response_class=HTMLResponse, tags=["General"])
-async def root():
+async def root(request: Request):
     """Serve the UI dashboard"""
-    static_file = os.path.join(os.path.dirname(__file__), "static", "index.html")
     # Only serve HTML if explicitly requested (e.g., Accept: text/html)
-    from fastapi import Request
-    from fastapi.responses import JSONResponse
-    import starlette.requests
-    request = None
-    try:
-        # Try to get the request object from context (for FastAPI dependency injection)
-        import inspect
-        frame = inspect.currentframe()
-        while frame:
-            if 'request' in frame.f_locals and isinstance(frame.f_locals['request'], (starlette.requests.Request, Request)):
-                request = frame.f_locals['request']
-                break
-            frame = frame.f_back
-    except Exception:
-        pass
-    if request and 'text/html' in request.headers.get('accept', ''):
-        if os.path.exists(static_file):
-            with open(static_file, "r") as f:
-                return HTMLResponse(content=f.read())
+    if INDEX_HTML is not None and 'text/html' in request.headers.get('accept', ''):
+        return HTMLResponse(content=INDEX_HTML)
     # Fallback: always return JSON for API clients
     return JSONResponse(content={
         "message": "Cat/Dogs Classifier API",
@@ -186,6 +331,8 @@ async def root():
         "endpoints": {
             "health": "/health",
             "predict": "/predict (POST)",
+            "predict-raw": "/predict-raw (POST, float32 bytes)",
+            "predict-u8": "/predict-u8 (POST, uint8 bytes)",
             "model-info": "/model-info",
             "metrics": "/metrics",
             "docs": "/docs"
@@ -214,7 +361,8 @@ async def predict(request: PredictionRequest):
     """
     Prediction endpoint
     
-    Accepts a 28x28 image and returns the predicted digit with probabilities
+    Accepts a 128x128x3 RGB image (values in [0, 1]) as nested lists or
+    base64 float32 bytes, and returns the predicted class with probabilities
     
     Args:
         request: PredictionRequest containing the image data
@@ -229,65 +377,202 @@ async def predict(request: PredictionRequest):
         )
     
     try:
-        # Convert input to numpy array
-        image_array = np.array(request.image, dtype=np.float32)
+        # Validator already converted the input to a float32 array
+        image_array = np.asarray(request.image, dtype=np.float32)
         
         # Log prediction request (without sensitive data)
-        logger.info(f"Prediction request received - Image shape: {image_array.shape}")
+        logger.info("Prediction request received - Image shape: %s", image_array.shape)
         
-        # Time inference
-        start_time = time.time()
-        
-        # Make prediction
-        result = model_inference.predict(image_array)
-        
-        # Calculate inference time
-        inference_time_ms = (time.time() - start_time) * 1000
+        return run_prediction(model_inference.predict, image_array)
         
-        # Record prediction metric
-        PREDICTION_COUNT.labels(
-            predicted_class=str(result['prediction'])
-        ).inc()
+    except Exception as e:
+        logger.error(f"Prediction failed: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+
+
+@app.post(
+    "/predict-raw",
+    response_model=PredictionResponse,
+    tags=["Prediction"],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/octet-stream": {
+                    "schema": {"type": "string", "format": "binary"}
+                }
+            }
+        }
+    }
+)
+async def predict_raw(request: Request):
+    """
+    Prediction endpoint for binary image payloads
+    
+    The request body is the raw image buffer: little-endian float32 values
+    in [0, 1], row-major with shape (128, 128, 3) (height, width, RGB),
+    i.e. exactly 196608 bytes. The buffer is reinterpreted with
+    np.frombuffer, skipping JSON parsing and per-pixel validation.
+    
+    Args:
+        request: Raw HTTP request whose body holds the image bytes
         
-        # Log prediction result
-        logger.info(
-            f"Prediction: {result['prediction']} - "
-            f"Confidence: {result['confidence']:.4f} - "
-            f"Inference time: {inference_time_ms:.2f}ms"
+    Returns:
+        PredictionResponse with prediction, probabilities, and confidence
+    """
+    if model_inference is None or not model_inference.is_loaded():
+        raise HTTPException(
+            status_code=503, 
+            detail="Model not loaded. Please try again later."
         )
-        
-        # Log to file for performance tracking
-        log_prediction_to_file(
-            prediction=result['prediction'],
-            confidence=result['confidence'],
-            inference_time_ms=inference_time_ms
+    
+    body = await request.body()
+    if len(body) != RAW_IMAGE_NBYTES:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"Expected {RAW_IMAGE_NBYTES} bytes of little-endian float32 "
+                f"data with shape {RAW_IMAGE_SHAPE}, got {len(body)} bytes"
+            )
         )
+    
+    try:
+        # bytearray gives a writable buffer so torch.from_numpy can share it
+        image_array = np.frombuffer(bytearray(body), dtype=RAW_IMAGE_DTYPE).reshape(RAW_IMAGE_SHAPE)
+        return run_prediction(model_inference.predict, image_array)
         
-        return PredictionResponse(
-            prediction=result['prediction'],
-            probabilities=result['probabilities'],
-            confidence=result['confidence'],
-            inference_time_ms=inference_time_ms
+    except Exception as e:
+        logger.error(f"Prediction failed: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+
+
+@app.post(
+    "/predict-u8",
+    response_model=PredictionResponse,
+    tags=["Prediction"],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/octet-stream": {
+                    "schema": {"type": "string", "format": "binary"}
+                }
+            }
+        }
+    }
+)
+async def predict_u8(request: Request):
+    """
+    Prediction endpoint for 8-bit binary image payloads
+    
+    The request body is the raw RGB pixel buffer: uint8 values in [0, 255],
+    row-major with shape (128, 128, 3) (height, width, RGB), i.e. exactly
+    49152 bytes. This is a quarter of the /predict-raw payload; scaling and
+    normalization happen on the model's device.
+    
+    Args:
+        request: Raw HTTP request whose body holds the pixel bytes
+        
+    Returns:
+        PredictionResponse with prediction, probabilities, and confidence
+    """
+    if model_inference is None or not model_inference.is_loaded():
+        raise HTTPException(
+            status_code=503, 
+            detail="Model not loaded. Please try again later."
+        )
+    
+    body = await request.body()
+    if len(body) != U8_IMAGE_NBYTES:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"Expected {U8_IMAGE_NBYTES} bytes of uint8 data with shape "
+                f"{RAW_IMAGE_SHAPE}, got {len(body)} bytes"
+            )
         )
+    
+    try:
+        image_u8 = np.frombuffer(bytearray(body), dtype=np.uint8).reshape(RAW_IMAGE_SHAPE)
+        return run_prediction(model_inference.predict_u8, image_u8)
         
     except Exception as e:
         logger.error(f"Prediction failed: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
 
+def run_prediction(predict_fn, image_array: np.ndarray) -> PredictionResponse:
+    """
+    Run the model on an image and record metrics and logs
+    
+    Args:
+        predict_fn: ModelInference prediction method to call
+        image_array: Image array accepted by predict_fn
+        
+    Returns:
+        PredictionResponse with prediction, probabilities, and confidence
+    """
+    # Time inference
+    start_ns = time.perf_counter_ns()
+    
+    # Make prediction
+    result = predict_fn(image_array)
+    
+    # Calculate inference time
+    inference_time_ms = (time.perf_counter_ns() - start_ns) / 1e6
+    
+    # Record prediction metric
+    record_prediction_metrics(result['prediction'], result['confidence'], inference_time_ms)
+    
+    # Log prediction result
+    logger.info(
+        "Prediction: %s - Confidence: %.4f - Inference time: %.2fms",
+        result['prediction'], result['confidence'], inference_time_ms
+    )
+    
+    # Log to file for performance tracking
+    log_prediction_to_file(
+        prediction=result['prediction'],
+        confidence=result['confidence'],
+        inference_time_ms=inference_time_ms
+    )
+    
+    # Values come straight from the model, so skip re-validating them
+    return PredictionResponse.model_construct(
+        prediction=result['prediction'],
+        probabilities=result['probabilities'],
+        confidence=result['confidence'],
+        inference_time_ms=inference_time_ms
+    )
+
+
 @app.get("/metrics", tags=["Monitoring"])
 async def metrics():
     """
     Prometheus metrics endpoint
     Returns metrics in Prometheus format
     """
-    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    global metrics_cache_lock
+    if metrics_cache_lock is None:
+        metrics_cache_lock = asyncio.Lock()
+    # Concurrent scrapes wait for one regeneration instead of each walking every metric
+    async with metrics_cache_lock:
+        now = time.monotonic()
+        if now - metrics_cache["generated_at"] >= METRICS_CACHE_TTL:
+            metrics_cache["body"] = generate_latest(METRICS_REGISTRY)
+            metrics_cache["generated_at"] = now
+        body = metrics_cache["body"]
+    return Response(content=body, media_type=CONTENT_TYPE_LATEST)
 
 
 @app.get("/stats", tags=["Monitoring"])
 async def get_stats():
     """
     Get basic statistics about predictions
+    
+    Totals are aggregated across workers and cover predictions since the
+    server started; they reset on restart (see logs/predictions.jsonl for
+    the persisted history).
     """
     try:
         stats = read_prediction_stats()
@@ -305,9 +590,31 @@ async def get_stats():
         }
 
 
+def summarize_model(model):
+    """
+    Compute the static parts of /model-info once per loaded model
+    
+    Args:
+        model: Loaded PyTorch model
+        
+    Returns:
+        Dictionary with formatted parameter counts and model file size
+    """
+    total_params = sum(p.numel() for p in model.parameters())
+    trainable_params = sum(p.numel() for p in model.parameters() if p.requires_grad)
+    summary = {
+        "total_parameters": f"{total_params:,}",
+        "trainable_parameters": f"{trainable_params:,}",
+    }
+    if MODEL_SIZE_MB is not None:
+        summary["model_size"] = f"{MODEL_SIZE_MB:.2f} MB"
+    return summary
+
+
 @app.get("/model-info", tags=["General"])
 async def model_info():
     """Get detailed model information"""
+    global model_summary
     try:
         # Get model architecture info if available
         model_details = {
@@ -324,25 +631,10 @@ async def model_info():
         # Add model-specific info if model is loaded
         if model_inference and model_inference.is_loaded():
             try:
-                import torch
-                model = model_inference.model
-                
-                # Count parameters
-                total_params = sum(p.numel() for p in model.parameters())
-                trainable_params = sum(p.numel() for p in model.parameters() if p.requires_grad)
-                
-                model_details.update({
-                    "total_parameters": f"{total_params:,}",
-                    "trainable_parameters": f"{trainable_params:,}",
-                    "model_loaded": True,
-                })
-                
-                # Try to get model file size
-                model_path = os.getenv('MODEL_PATH', 'models/cat_dogs_cnn_model.pt')
-                if os.path.exists(model_path):
-                    size_bytes = os.path.getsize(model_path)
-                    size_mb = size_bytes / (1024 * 1024)
-                    model_details["model_size"] = f"{size_mb:.2f} MB"
+                if model_summary is None:
+                    model_summary = summarize_model(model_inference.model)
+                model_details.update(model_summary)
+                model_details["model_loaded"] = True
                 
             except Exception as e:
                 logger.error(f"Error getting model details: {e}")
@@ -371,7 +663,7 @@ class ImagePredictionRequest(BaseModel):
     image: str = Field(..., description="Base64 encoded image")
 
 
-@app.post("/predict-image", tags=["Prediction"])
+@app.post("/predict-image", response_model=PredictionResponse, tags=["Prediction"])
 async def predict_image(request: ImagePredictionRequest):
     """
     Predict cat/dog from base64 encoded image
@@ -459,9 +751,10 @@ async def predict_image(request: ImagePredictionRequest):
                 detail=f"Failed to convert image to RGB format: {str(e)}"
             )
         
-        # Resize to 128x128 (cats/dogs model input size)
+        # Resize to 128x128 (cats/dogs model input size) with the same
+        # box-reduce + bilinear resize the training pipeline uses
         try:
-            image = image.resize((128, 128), Image.Resampling.LANCZOS)
+            image = ReducingResize(128)(image)
         except Exception as e:
             logger.error(f"Image resize error: {str(e)}")
             raise HTTPException(
@@ -471,17 +764,17 @@ async def predict_image(request: ImagePredictionRequest):
         
         # Convert to numpy array and normalize
         try:
-            image_array = np.array(image, dtype=np.float32)
+            pixels = np.asarray(image, dtype=np.uint8)
             
             # Validate array shape
-            if image_array.shape != (128, 128, 3):
+            if pixels.shape != (128, 128, 3):
                 raise HTTPException(
                     status_code=500,
-                    detail=f"Unexpected image array shape: {image_array.shape}. Expected (128, 128, 3)"
+                    detail=f"Unexpected image array shape: {pixels.shape}. Expected (128, 128, 3)"
                 )
             
-            # Normalize to [0, 1]
-            image_array = image_array / 255.0
+            # Cast and normalize to [0, 1] in a single pass
+            image_array = np.multiply(pixels, np.float32(1.0 / 255.0), dtype=np.float32)
             
         except HTTPException:
             raise
@@ -493,7 +786,7 @@ async def predict_image(request: ImagePredictionRequest):
             )
         
         # Time inference
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         
         # Make prediction
         try:
@@ -516,28 +809,26 @@ async def predict_image(request: ImagePredictionRequest):
             )
         
         # Calculate inference time
-        inference_time_ms = (time.time() - start_time) * 1000
+        inference_time_ms = (time.perf_counter_ns() - start_ns) / 1e6
         
         # Record prediction metric
         try:
-            PREDICTION_COUNT.labels(
-                predicted_class=str(result['prediction'])
-            ).inc()
+            record_prediction_metrics(result['prediction'], result['confidence'], inference_time_ms)
         except Exception as e:
             # Don't fail the request if metrics recording fails
             logger.warning(f"Failed to record prediction metric: {str(e)}")
         
         logger.info(
-            f"Image prediction: {result['prediction']} - "
-            f"Confidence: {result['confidence']:.4f}"
+            "Image prediction: %s - Confidence: %.4f",
+            result['prediction'], result['confidence']
         )
         
-        return {
-            "prediction": result['prediction'],
-            "confidence": result['confidence'],
-            "probabilities": result['probabilities'],
-            "inference_time_ms": inference_time_ms
-        }
+        return PredictionResponse.model_construct(
+            prediction=result['prediction'],
+            probabilities=result['probabilities'],
+            confidence=result['confidence'],
+            inference_time_ms=inference_time_ms
+        )
         
     except HTTPException:
         # Re-raise HTTPExceptions as-is
@@ -553,71 +844,86 @@ async def predict_image(request: ImagePredictionRequest):
 
 def log_prediction_to_file(prediction: int, confidence: float, inference_time_ms: float):
     """
-    Log prediction to file for performance tracking
+    Queue a prediction for the performance tracking log
+    
+    Entries are kept in a bounded in-memory buffer and written to disk by
+    the background flusher, so no file I/O happens on the request path.
     
     Args:
         prediction: Predicted class
         confidence: Confidence score
         inference_time_ms: Inference time in milliseconds
     """
+    prediction_log_buffer.append({
+        "timestamp": datetime.utcnow().isoformat(),
+        "prediction": prediction,
+        "confidence": confidence,
+        "inference_time_ms": inference_time_ms
+    })
+
+
+def flush_prediction_log():
+    """
+    Write all buffered prediction log entries to the log file
+    
+    Returns:
+        Number of entries written
+    """
+    entries = []
+    while prediction_log_buffer:
+        entries.append(prediction_log_buffer.popleft())
+    
+    if not entries:
+        return 0
+    
     try:
-        log_dir = "logs"
-        os.makedirs(log_dir, exist_ok=True)
-        
-        log_entry = {
-            "timestamp": datetime.utcnow().isoformat(),
-            "prediction": prediction,
-            "confidence": confidence,
-            "inference_time_ms": inference_time_ms
-        }
-        
-        log_file = os.path.join(log_dir, "predictions.jsonl")
-        with open(log_file, "a") as f:
-            f.write(json.dumps(log_entry) + "\n")
-            
+        os.makedirs(os.path.dirname(PREDICTION_LOG_FILE), exist_ok=True)
+        with open(PREDICTION_LOG_FILE, "a", buffering=1 << 16) as f:
+            f.write("\n".join(json.dumps(entry) for entry in entries) + "\n")
     except Exception as e:
-        logger.error(f"Failed to log prediction to file: {str(e)}")
+        logger.error(f"Failed to log predictions to file: {str(e)}")
+    
+    return len(entries)
+
+
+async def prediction_log_flush_loop():
+    """Periodically drain the prediction log buffer to disk"""
+    while True:
+        await asyncio.sleep(PREDICTION_LOG_FLUSH_INTERVAL)
+        if prediction_log_buffer:
+            await asyncio.to_thread(flush_prediction_log)
 
 
 def read_prediction_stats():
     """
-    Read and compute statistics from prediction logs
+    Compute prediction statistics from the Prometheus counters
+    
+    Reads METRICS_REGISTRY, so with several workers (PROMETHEUS_MULTIPROC_DIR)
+    the totals cover every worker rather than whichever one took the request.
+    Counters start at zero when the server starts; the full history is in
+    the prediction log file.
     
     Returns:
         Dictionary with prediction statistics
     """
-    log_file = "logs/predictions.jsonl"
-    
-    if not os.path.exists(log_file):
-        return {}
-    
-    predictions = []
-    confidences = []
-    inference_times = []
     distribution = {}
+    sums = {}
+    for metric in METRICS_REGISTRY.collect():
+        for sample in metric.samples:
+            if sample.name == 'predictions_total':
+                predicted_class = sample.labels['predicted_class']
+                distribution[predicted_class] = distribution.get(predicted_class, 0) + int(sample.value)
+            elif sample.name in ('prediction_confidence_sum_total', 'prediction_inference_time_ms_sum_total'):
+                sums[sample.name] = sums.get(sample.name, 0.0) + sample.value
     
-    with open(log_file, "r") as f:
-        for line in f:
-            try:
-                entry = json.loads(line.strip())
-                pred = entry["prediction"]
-                predictions.append(pred)
-                confidences.append(entry["confidence"])
-                inference_times.append(entry["inference_time_ms"])
-                
-                distribution[str(pred)] = distribution.get(str(pred), 0) + 1
-                
-            except Exception as e:
-                logger.error(f"Failed to parse log entry: {str(e)}")
-                continue
-    
-    if not predictions:
+    total = sum(distribution.values())
+    if total == 0:
         return {}
     
     return {
-        "total": len(predictions),
-        "avg_confidence": np.mean(confidences),
-        "avg_inference_time": np.mean(inference_times),
+        "total": total,
+        "avg_confidence": sums.get('prediction_confidence_sum_total', 0.0) / total,
+        "avg_inference_time": sums.get('prediction_inference_time_ms_sum_total', 0.0) / total,
         "distribution": distribution
     }
 
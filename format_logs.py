@@ -1,27 +1,32 @@
 #!/usr/bin/env python3
 import json
-from datetime import datetime
+import numpy as np
 
 with open('logs/cloudwatch/eks_recent_20260218_134508.json', 'r') as f:
     data = json.load(f)
 
+events = data.get('events') or []
+
 with open('logs/cloudwatch/eks_recent_20260218_134508.txt', 'w') as out:
     out.write('CloudWatch EKS Logs - Most Recent 500 Events\n')
     out.write('=' * 70 + '\n\n')
-    
-    if 'events' in data and data['events']:
-        first_time = datetime.fromtimestamp(data['events'][0]['timestamp'] / 1000)
-        last_time = datetime.fromtimestamp(data['events'][-1]['timestamp'] / 1000)
-        out.write(f'Time Range: {first_time} to {last_time}\n')
-        out.write(f'Total Events: {len(data["events"])}\n\n')
+
+    if events:
+        # CloudWatch timestamps are epoch milliseconds (UTC); convert them all
+        # in one call instead of building a datetime object per event
+        timestamps = np.datetime_as_string(
+            np.array([event['timestamp'] for event in events], dtype='datetime64[ms]'), unit='ms'
+        )
+        out.write(f'Time Range: {timestamps[0]} to {timestamps[-1]} (UTC)\n')
+        out.write(f'Total Events: {len(events)}\n\n')
         out.write('=' * 70 + '\n\n')
-        
-        for event in data['events']:
-            ts = datetime.fromtimestamp(event['timestamp'] / 1000)
-            msg = event.get('message', '').strip()
-            out.write(f'{ts} | {msg}\n')
+
+        out.writelines(
+            f'{ts} | {event.get("message", "").strip()}\n'
+            for ts, event in zip(timestamps, events)
+        )
     else:
         out.write('No events found\n')
 
 print('✓ Created readable log: logs/cloudwatch/eks_recent_20260218_134508.txt')
-print(f'✓ Total events: {len(data.get("events", []))}')
+print(f'✓ Total events: {len(events)}')
@@ -3,49 +3,52 @@
 Generate sample prediction requests for testing
 """
 import json
+import base64
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
 import numpy as np
-from torchvision import datasets, transforms
+from src.data_preprocessing import load_cat_dogs_split
 
 
-def generate_sample_requests(num_samples=5, output_file='sample_requests.json'):
+def generate_sample_requests(num_samples=5, output_file='sample_requests.json',
+                             data_dir='data/raw/cat_dogs'):
     """
-    Generate sample prediction requests from test data
-    (Note: Uses MNIST for demo purposes - actual API uses Cats-Dogs model)
+    Generate sample prediction requests from the Cats-Dogs validation split
+    
+    Each request holds a (128, 128, 3) RGB image with values in [0, 1], the
+    layout /predict passes to the model.
     
     Args:
         num_samples: Number of sample requests to generate
         output_file: Output JSON file
+        data_dir: Root directory containing train/val folders
     """
     print(f"Generating {num_samples} sample prediction requests...")
     
-    # Load test data (MNIST used for demo purposes)
-    transform = transforms.Compose([
-        transforms.ToTensor(),
-        transforms.Normalize((0.1307,), (0.3081,))
-    ])
-    
-    test_dataset = datasets.MNIST(
-        'data/raw',
-        train=False,
-        download=True,
-        transform=transform
-    )
+    # Resized uint8 samples; scaling to [0, 1] happens below
+    test_dataset = load_cat_dogs_split(data_dir, split='val', normalize=False)
     
     # Select random samples
-    indices = np.random.choice(len(test_dataset), num_samples, replace=False)
+    indices = np.random.choice(len(test_dataset), min(num_samples, len(test_dataset)), replace=False)
     
     samples = []
     
     for idx in indices:
         image, label = test_dataset[idx]
         
-        # Convert to numpy and reshape
-        image_np = image.numpy().squeeze()  # (28, 28)
+        # CHW uint8 tensor -> HWC float32 in [0, 1]
+        image_np = image.permute(1, 2, 0).numpy().astype(np.float32) / 255.0  # (128, 128, 3)
         
-        # Create request
+        # Create request with the pixels as base64 float32 bytes rather than
+        # a nested list of Python floats
         request = {
             "true_label": int(label),
-            "image": image_np.tolist()
+            "image_b64": base64.b64encode(image_np.tobytes()).decode(),
+            "shape": list(image_np.shape),
+            "dtype": "float32"
         }
         
         samples.append(request)
@@ -54,7 +57,7 @@ def generate_sample_requests(num_samples=5, output_file='sample_requests.json'):
     with open(output_file, 'w') as f:
         json.dump(samples, f, indent=2)
     
-    print(f"✓ Saved {num_samples} samples to {output_file}")
+    print(f"✓ Saved {len(samples)} samples to {output_file}")
     
     # Print example curl commands
     print("\nExample curl commands:")
@@ -64,7 +67,7 @@ def generate_sample_requests(num_samples=5, output_file='sample_requests.json'):
         print(f"\nSample {i} (True label: {sample['true_label']}):")
         print("curl -X POST http://localhost:8000/predict \\")
         print("  -H 'Content-Type: application/json' \\")
-        print(f"  -d '{{\"image\": {json.dumps(sample['image'][:2])[:100]}...}}'")
+        print(f"  -d '{{\"image_b64\": \"{sample['image_b64'][:60]}...\", \"shape\": {sample['shape']}, \"dtype\": \"float32\"}}'")
     
     print("\n" + "-" * 60)
     print(f"\nAll samples saved to: {output_file}")
@@ -78,7 +81,9 @@ if __name__ == "__main__":
                        help='Number of samples to generate')
     parser.add_argument('--output', type=str, default='sample_requests.json',
                        help='Output file path')
+    parser.add_argument('--data-dir', type=str, default='data/raw/cat_dogs',
+                       help='Cats-Dogs data directory (train/val folders)')
     
     args = parser.parse_args()
     
-    generate_sample_requests(args.num_samples, args.output)
+    generate_sample_requests(args.num_samples, args.output, args.data_dir)
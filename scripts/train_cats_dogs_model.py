@@ -8,6 +8,7 @@ import sys
 import urllib.request
 import zipfile
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Add parent directory to path
@@ -18,6 +19,7 @@ import torchvision
 from torchvision import datasets, transforms
 from torch.utils.data import DataLoader, random_split
 import numpy as np
+from PIL import Image
 from tqdm import tqdm
 
 from src.model import CatDogsCNN, train_model
@@ -58,23 +60,25 @@ def download_kaggle_cats_dogs_sample():
     
     def extract_images(dataset, output_dir, max_per_class=500):
         """Extract cat and dog images from CIFAR-10"""
-        cat_count = 0
-        dog_count = 0
+        # CIFAR-10 keeps every image in one (N, 32, 32, 3) uint8 array, so the
+        # first max_per_class of each class are picked with a single mask
+        labels = np.asarray(dataset.targets)
+        cat_idx = np.flatnonzero(labels == 3)[:max_per_class]  # Cat
+        dog_idx = np.flatnonzero(labels == 5)[:max_per_class]  # Dog
         
-        for idx, (img, label) in enumerate(tqdm(dataset, desc=f"Processing {output_dir.name}")):
-            if label == 3 and cat_count < max_per_class:  # Cat
-                save_path = output_dir / "cats" / f"cat_{cat_count:04d}.png"
-                img.save(save_path)
-                cat_count += 1
-            elif label == 5 and dog_count < max_per_class:  # Dog
-                save_path = output_dir / "dogs" / f"dog_{dog_count:04d}.png"
-                img.save(save_path)
-                dog_count += 1
-            
-            if cat_count >= max_per_class and dog_count >= max_per_class:
-                break
+        jobs = [(i, output_dir / "cats" / f"cat_{n:04d}.png") for n, i in enumerate(cat_idx)]
+        jobs += [(i, output_dir / "dogs" / f"dog_{n:04d}.png") for n, i in enumerate(dog_idx)]
         
-        return cat_count, dog_count
+        def save(job):
+            index, save_path = job
+            Image.fromarray(dataset.data[index]).save(save_path)
+        
+        # PNG encoding and file writes release the GIL, so they overlap on threads
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for _ in tqdm(executor.map(save, jobs), total=len(jobs), desc=f"Processing {output_dir.name}"):
+                pass
+        
+        return len(cat_idx), len(dog_idx)
     
     # Extract training images
     train_cats, train_dogs = extract_images(cifar_train, train_dir, max_per_class=400)
@@ -87,9 +91,13 @@ def download_kaggle_cats_dogs_sample():
     return data_dir
 
 
-def train_quick_model(epochs=10):
+def train_quick_model(epochs=10, cache_dir='data/processed/cat_dogs'):
     """
     Train a cats-dogs model with configurable epochs
+    
+    With cache_dir set, the images are decoded and resized once into
+    memory-mapped uint8 shards there, and every epoch reads batches from
+    those instead of opening each PNG again.
     """
     print("\n" + "="*70)
     print("Training Cats-Dogs Classifier")
@@ -99,6 +107,9 @@ def train_quick_model(epochs=10):
     data_dir = Path("data/raw/cat_dogs")
     if not (data_dir / "train").exists():
         data_dir = download_kaggle_cats_dogs_sample()
+        if cache_dir:
+            # Shards from an earlier download no longer match the images
+            shutil.rmtree(cache_dir, ignore_errors=True)
     else:
         print(f"Using existing data at {data_dir}")
     
@@ -109,7 +120,8 @@ def train_quick_model(epochs=10):
         batch_size=32,
         learning_rate=0.001,
         experiment_name="cat_dogs_quick_deploy",
-        data_dir=str(data_dir)
+        data_dir=str(data_dir),
+        cache_dir=cache_dir
     )
     
     print("\n" + "="*70)
@@ -149,6 +161,10 @@ if __name__ == "__main__":
                         help='Only verify existing model')
     parser.add_argument('--epochs', type=int, default=10,
                         help='Number of training epochs (default: 10)')
+    parser.add_argument('--cache-dir', default='data/processed/cat_dogs',
+                        help='Where to keep the decoded image cache (default: data/processed/cat_dogs)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Read the image files every epoch instead of using the cache')
     
     args = parser.parse_args()
     
@@ -159,7 +175,10 @@ if __name__ == "__main__":
         print("\n✓ Data download complete!")
     else:
         # Full training pipeline
-        model, accuracy = train_quick_model(epochs=args.epochs)
+        model, accuracy = train_quick_model(
+            epochs=args.epochs,
+            cache_dir=None if args.no_cache else args.cache_dir
+        )
         
         # Verify the model
         if verify_model():
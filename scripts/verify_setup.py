@@ -2,7 +2,8 @@
 """
 Quick test script to verify the complete pipeline
 """
-import subprocess
+import importlib.util
+import shutil
 import sys
 import os
 from pathlib import Path
@@ -15,30 +16,30 @@ def print_header(text):
     print("=" * 60 + "\n")
 
 
-def run_command(cmd, description, check=True):
-    """Run a shell command and report status"""
+def check_condition(passed, description):
+    """Report the result of a check that was evaluated in-process"""
     print(f"→ {description}...")
-    try:
-        result = subprocess.run(
-            cmd,
-            shell=True,
-            check=check,
-            capture_output=True,
-            text=True
-        )
-        if result.returncode == 0:
-            print(f"✓ {description} - SUCCESS")
-            return True
-        else:
-            print(f"✗ {description} - FAILED")
-            if result.stderr:
-                print(f"  Error: {result.stderr[:200]}")
-            return False
-    except Exception as e:
-        print(f"✗ {description} - ERROR: {str(e)}")
+    if passed:
+        print(f"✓ {description} - SUCCESS")
+        return True
+    else:
+        print(f"✗ {description} - FAILED")
         return False
 
 
+def tool_available(command, module=None):
+    """Check a tool is on PATH (or importable) without starting a subprocess"""
+    if shutil.which(command) is not None:
+        return True
+    return module is not None and importlib.util.find_spec(module) is not None
+
+
+def file_contains(filepath, text):
+    """Check if a file contains the given text"""
+    path = Path(filepath)
+    return path.is_file() and text in path.read_text(encoding='utf-8', errors='ignore')
+
+
 def check_file_exists(filepath, description):
     """Check if a file exists"""
     print(f"→ Checking {description}...")
@@ -62,16 +63,14 @@ def main():
     # M1: Model Development
     print_header("M1: Model Development & Experiment Tracking")
     
-    results['git'] = run_command(
-        "git status",
-        "Git repository initialized",
-        check=False
+    results['git'] = check_condition(
+        tool_available("git") and Path(".git").exists(),
+        "Git repository initialized"
     )
     
-    results['dvc'] = run_command(
-        "dvc version",
-        "DVC installed",
-        check=False
+    results['dvc'] = check_condition(
+        tool_available("dvc", module="dvc"),
+        "DVC installed"
     )
     
     results['requirements'] = check_file_exists(
@@ -97,10 +96,9 @@ def main():
         "Dockerfile"
     )
     
-    results['docker'] = run_command(
-        "docker --version",
-        "Docker installed",
-        check=False
+    results['docker'] = check_condition(
+        tool_available("docker"),
+        "Docker installed"
     )
     
     # M3: Testing
@@ -114,10 +112,9 @@ def main():
         "Inference tests"
     )
     
-    results['pytest'] = run_command(
-        "python -m pytest --version",
-        "Pytest installed",
-        check=False
+    results['pytest'] = check_condition(
+        importlib.util.find_spec("pytest") is not None,
+        "Pytest installed"
     )
     
     results['ci'] = check_file_exists(
@@ -152,16 +149,14 @@ def main():
     print_header("M5: Monitoring & Logging")
     
     # Check if monitoring code is in API
-    results['monitoring'] = run_command(
-        "grep -q 'prometheus_client' api/main.py",
-        "Prometheus monitoring in API",
-        check=False
+    results['monitoring'] = check_condition(
+        file_contains("api/main.py", "prometheus_client"),
+        "Prometheus monitoring in API"
     )
     
-    results['logging'] = run_command(
-        "grep -q 'logging' api/main.py",
-        "Logging configured in API",
-        check=False
+    results['logging'] = check_condition(
+        file_contains("api/main.py", "logging"),
+        "Logging configured in API"
     )
     
     results['eval_script'] = check_file_exists(
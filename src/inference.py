@@ -4,9 +4,8 @@ Handles model loading and prediction
 """
 import torch
 import numpy as np
-import os
-from src.data_preprocessing import preprocess_image
-from src.model import CatDogsCNN
+from src.data_preprocessing import preprocess_image, preprocess_images_batch, normalize_batch
+from src.model import CatDogsCNN, autocast_dtype, enable_compile_cache
 
 
 def load_model_for_inference(model_path='models/cat_dogs_cnn_model.pt'):
@@ -19,20 +18,56 @@ class ModelInference:
     """
     Model inference handler for Cat/Dogs classifier
     """
-    def __init__(self, model_path='models/cat_dogs_cnn_model.pt'):
+    def __init__(self, model_path='models/cat_dogs_cnn_model.pt', compile_model=False, quantize=False):
         self.model_path = model_path
+        self.compile_model = compile_model
+        self.quantize = quantize
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        # Mixed precision on GPU; None keeps CPU inference in float32
+        self.amp_dtype = autocast_dtype(self.device)
         self.model = None
         self.load_model()
 
     def load_model(self):
-        if not os.path.exists(self.model_path):
+        # mmap avoids reading the whole checkpoint into a bytes buffer first, and
+        # weights_only skips the general pickle machinery; a missing file is
+        # reported by the open itself rather than a separate exists() check
+        try:
+            state_dict = torch.load(self.model_path, map_location='cpu', mmap=True, weights_only=True)
+        except FileNotFoundError:
             raise FileNotFoundError(f"Model file not found at {self.model_path}")
-        self.model = CatDogsCNN().to(self.device)
-        self.model.load_state_dict(torch.load(self.model_path, map_location=self.device))
+        self.model = CatDogsCNN()
+        # assign=True adopts the loaded tensors instead of copying into fresh ones
+        self.model.load_state_dict(state_dict, assign=True)
+        self.model = self.model.to(self.device)
         self.model.eval()
+        # NHWC lets the conv kernels run without layout shuffles; the input
+        # images already arrive HWC, so their conversion is free
+        self.model = self.model.to(memory_format=torch.channels_last)
+        if self.quantize and self.device.type == 'cpu':
+            # fc1 holds almost all of the weights; int8 dynamic quantization
+            # swaps its fp32 GEMM for an int8 one (convs stay fp32)
+            self.model = torch.ao.quantization.quantize_dynamic(
+                self.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        if self.device.type == 'cuda':
+            # Input size is fixed, so autotuned conv algorithms stay valid
+            torch.backends.cudnn.benchmark = True
+        if self.compile_model:
+            enable_compile_cache()
+            self.model = torch.compile(self.model)
+        self.warmup()
         print(f"Model loaded from {self.model_path}")
 
+    def warmup(self):
+        """Run one dummy forward pass so the first real request doesn't pay for lazy initialization"""
+        with torch.inference_mode(), self.autocast():
+            self.model(torch.zeros(1, 3, 128, 128, device=self.device).contiguous(memory_format=torch.channels_last))
+
+    def autocast(self):
+        """Autocast context for forward passes (a no-op on CPU)"""
+        return torch.autocast(self.device.type, dtype=self.amp_dtype, enabled=self.amp_dtype is not None)
+
     def predict(self, image_input):
         """
         Make prediction on image
@@ -54,37 +89,104 @@ class ModelInference:
             # Numpy array - convert to tensor
             # Expected shape: (128, 128, 3) with values in [0, 1]
             if image_input.ndim == 3 and image_input.shape[2] == 3:
-                # Convert HWC to CHW format
-                image_tensor = torch.from_numpy(image_input).permute(2, 0, 1).float()
-                # Normalize using ImageNet stats
-                mean = torch.tensor([0.485, 0.456, 0.406]).view(3, 1, 1)
-                std = torch.tensor([0.229, 0.224, 0.225]).view(3, 1, 1)
-                image_tensor = (image_tensor - mean) / std
-                # Add batch dimension
-                image_tensor = image_tensor.unsqueeze(0).to(self.device)
+                # Convert HWC to CHW format and add batch dimension
+                image_tensor = torch.from_numpy(image_input).permute(2, 0, 1).unsqueeze(0)
+                # Normalize using ImageNet stats (values are in [0, 1])
+                image_tensor = normalize_batch(image_tensor.to(self.device), max_value=1.0)
             else:
                 raise ValueError(f"Invalid numpy array shape: {image_input.shape}. Expected (128, 128, 3)")
         else:
             raise TypeError(f"image_input must be str or np.ndarray, got {type(image_input)}")
         
-        with torch.no_grad():
-            output = self.model(image_tensor)
-            probabilities = torch.nn.functional.softmax(output, dim=1)
+        return self.predict_tensor(image_tensor)
+
+    def predict_u8(self, image_u8):
+        """
+        Make prediction on a raw 8-bit RGB image
+        
+        The uint8 pixels are copied to the device as-is and scaled and
+        normalized there, so only a quarter of the float32 bytes are moved.
+        
+        Args:
+            image_u8: numpy uint8 array of shape (128, 128, 3) with values in [0, 255]
+        
+        Returns:
+            Dictionary with prediction, probabilities, and confidence
+        """
+        if self.model is None:
+            raise RuntimeError("Model not loaded. Call load_model() first.")
+        if not isinstance(image_u8, np.ndarray) or image_u8.dtype != np.uint8:
+            raise TypeError(f"image_u8 must be a uint8 np.ndarray, got {getattr(image_u8, 'dtype', type(image_u8))}")
+        if image_u8.shape != (128, 128, 3):
+            raise ValueError(f"Invalid numpy array shape: {image_u8.shape}. Expected (128, 128, 3)")
+        
+        image_tensor = torch.from_numpy(image_u8).permute(2, 0, 1).unsqueeze(0)
+        image_tensor = normalize_batch(image_tensor.to(self.device, non_blocking=True))
+        return self.predict_tensor(image_tensor)
+
+    def predict_tensor(self, image_tensor):
+        """
+        Make prediction on a preprocessed tensor
+        
+        Args:
+            image_tensor: Normalized tensor of shape (1, 3, 128, 128) on self.device
+        
+        Returns:
+            Dictionary with prediction, probabilities, and confidence
+        """
+        return self.predict_tensor_batch(image_tensor)[0]
+
+    def predict_tensor_batch(self, image_tensor):
+        """
+        Make predictions on a batch of preprocessed images in one forward pass
+        
+        Args:
+            image_tensor: Normalized tensor of shape (N, 3, 128, 128) on self.device
+        
+        Returns:
+            List of N dictionaries with prediction, probabilities, and confidence
+        """
+        image_tensor = image_tensor.contiguous(memory_format=torch.channels_last)
+        with torch.inference_mode():
+            with self.autocast():
+                output = self.model(image_tensor)
+            probabilities = torch.nn.functional.softmax(output.float(), dim=1)
             confidence, predicted = torch.max(probabilities, 1)
-        probabilities_np = probabilities.cpu().numpy()[0]
-        predicted_class = predicted.item()
-        confidence_score = confidence.item()
-        return {
-            'prediction': predicted_class,
-            'probabilities': probabilities_np.tolist(),
-            'confidence': confidence_score
-        }
+        probabilities_list = probabilities.cpu().tolist()
+        predicted_list = predicted.cpu().tolist()
+        confidence_list = confidence.cpu().tolist()
+        return [
+            {
+                'prediction': predicted_class,
+                'probabilities': probs,
+                'confidence': confidence_score
+            }
+            for predicted_class, probs, confidence_score in zip(predicted_list, probabilities_list, confidence_list)
+        ]
 
-    def predict_batch(self, image_paths):
+    def predict_batch(self, image_paths, max_batch=64):
+        """
+        Make predictions on several image files
+        
+        Images are decoded in parallel, copied to the device as uint8 and
+        normalized there, and run through the model in batches of up to
+        max_batch per forward pass.
+        
+        Args:
+            image_paths: List of image file paths
+            max_batch: Maximum number of images per forward pass
+        
+        Returns:
+            List of dictionaries with prediction, probabilities, and confidence
+        """
+        if self.model is None:
+            raise RuntimeError("Model not loaded. Call load_model() first.")
+        
         results = []
-        for image_path in image_paths:
-            result = self.predict(image_path)
-            results.append(result)
+        for start in range(0, len(image_paths), max_batch):
+            chunk = image_paths[start:start + max_batch]
+            batch = preprocess_images_batch(chunk, device=self.device)
+            results.extend(self.predict_tensor_batch(batch))
         return results
 
     def is_loaded(self):
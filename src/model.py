@@ -8,11 +8,15 @@ import torch.optim as optim
 import mlflow
 import mlflow.pytorch
 import numpy as np
-from sklearn.metrics import confusion_matrix, classification_report
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+import sys
 from tqdm import tqdm
+from src.data_preprocessing import normalize_batch
+
+NUM_CLASSES = 2  # cat, dog
+COMPILE_CACHE_DIR = os.getenv('TORCH_COMPILE_CACHE_DIR', '.torchinductor_cache')
 
 
 
@@ -30,23 +34,162 @@ class CatDogsCNN(nn.Module):
         self.conv2 = nn.Conv2d(32, 64, kernel_size=3, padding=1)
         self.pool = nn.MaxPool2d(2, 2)
         self.fc1 = nn.Linear(64 * 32 * 32, 128)  # for 128x128 input
-        self.fc2 = nn.Linear(128, 2)  # 2 classes: cat, dog
+        self.fc2 = nn.Linear(128, NUM_CLASSES)
         self.dropout = nn.Dropout(0.25)
-        self.relu = nn.ReLU()
+        self.relu = nn.ReLU(inplace=True)
 
     def forward(self, x):
         x = self.relu(self.conv1(x))
         x = self.pool(x)
         x = self.relu(self.conv2(x))
         x = self.pool(x)
-        x = x.view(-1, 64 * 32 * 32)
+        x = torch.flatten(x, 1)
         x = self.relu(self.fc1(x))
         x = self.dropout(x)
         x = self.fc2(x)
         return x
 
 
-def train_epoch(model, train_loader, criterion, optimizer, device):
+def to_model_input(data, device):
+    """
+    Move a batch to the device, scaling and normalizing uint8 batches there
+    
+    Args:
+        data: Batch tensor, either normalized float32 or uint8 in [0, 255]
+        device: Device to move the batch to
+        
+    Returns:
+        Normalized float32 batch on the device, in channels_last layout
+    """
+    # Relayout before the float conversion so a uint8 batch is shuffled at a
+    # quarter of the bytes; NHWC cache batches are already channels_last
+    data = data.to(device, non_blocking=True).contiguous(memory_format=torch.channels_last)
+    if data.dtype == torch.uint8:
+        data = normalize_batch(data)
+    return data
+
+
+def device_batches(loader, device):
+    """
+    Iterate over a loader with batches already moved to the device
+    
+    On CUDA the next batch is copied (and normalized) on a side stream
+    while the caller is still computing on the current one.
+    
+    Args:
+        loader: Iterable of (data, target) CPU batches
+        device: Device to move the batches to
+        
+    Yields:
+        (data, target) on the device, data normalized float32
+    """
+    device = torch.device(device)
+    if device.type != 'cuda':
+        for data, target in loader:
+            yield to_model_input(data, device), target.to(device, non_blocking=True)
+        return
+    
+    if device.index is None:
+        # torch.device('cuda') != torch.device('cuda', 0); resolve the index so
+        # resident batches (which report an indexed device) are recognized
+        device = torch.device('cuda', torch.cuda.current_device())
+    compute_stream = torch.cuda.current_stream(device)
+    copy_stream = torch.cuda.Stream(device)
+    pending = None
+    for data, target in loader:
+        if data.device == device:
+            # Already resident (DeviceDataLoader); there is no copy to overlap
+            yield to_model_input(data, device), target
+            continue
+        with torch.cuda.stream(copy_stream):
+            data = to_model_input(data, device)
+            target = target.to(device, non_blocking=True)
+            ready = torch.cuda.Event()
+            ready.record(copy_stream)
+        if pending is not None:
+            yield pending_batch(pending, compute_stream)
+        pending = (data, target, ready)
+    if pending is not None:
+        yield pending_batch(pending, compute_stream)
+
+
+def pending_batch(pending, compute_stream):
+    """
+    Hand a batch copied on a side stream over to the compute stream
+    
+    Args:
+        pending: (data, target, ready event) from device_batches
+        compute_stream: Stream the batch will be used on
+        
+    Returns:
+        (data, target)
+    """
+    data, target, ready = pending
+    compute_stream.wait_event(ready)
+    # The tensors were allocated on the copy stream; keep their memory
+    # from being reused before the compute stream is done with them
+    data.record_stream(compute_stream)
+    target.record_stream(compute_stream)
+    return data, target
+
+
+def autocast_dtype(device):
+    """
+    Pick the mixed-precision dtype for forward passes on a device
+    
+    Args:
+        device: Device the model runs on
+        
+    Returns:
+        torch.bfloat16 on GPUs that support it, torch.float16 on older GPUs,
+        None (full float32) on CPU/MPS
+    """
+    if torch.device(device).type != 'cuda':
+        return None
+    return torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+
+
+def enable_compile_cache(cache_dir=COMPILE_CACHE_DIR):
+    """
+    Keep torch.compile's generated kernels in a directory that outlives the process
+    
+    Inductor's default cache lives under /tmp, which is gone on every fresh
+    container or CI runner; with a persistent directory (mounted or restored
+    between runs) later compiles of the same model skip codegen. The default
+    location can be changed with TORCH_COMPILE_CACHE_DIR.
+    
+    Args:
+        cache_dir: Directory for Inductor's kernel and FX graph caches
+        
+    Returns:
+        The cache directory in use
+    """
+    import torch._inductor.config as inductor_config
+    # Inductor re-reads this variable whenever it resolves its cache paths
+    cache_dir = os.path.abspath(cache_dir)
+    os.environ['TORCHINDUCTOR_CACHE_DIR'] = cache_dir
+    inductor_config.fx_graph_cache = True
+    return cache_dir
+
+
+def progress_bar(loader, desc):
+    """
+    Wrap a loader in a tqdm bar that redraws at most once a second
+    
+    The bar is disabled when stderr is not a terminal (CI, log files),
+    where every redraw would just be another line of output.
+    
+    Args:
+        loader: Iterable to wrap
+        desc: Label shown in front of the bar
+        
+    Returns:
+        tqdm iterator over loader
+    """
+    return tqdm(loader, desc=desc, mininterval=1.0, miniters=50, disable=not sys.stderr.isatty())
+
+
+def train_epoch(model, train_loader, criterion, optimizer, device, scaler=None):
     """
     Train for one epoch
     
@@ -56,25 +199,34 @@ def train_epoch(model, train_loader, criterion, optimizer, device):
         criterion: Loss function
         optimizer: Optimizer
         device: Device to train on
+        scaler: torch.amp.GradScaler, needed when autocasting to float16
         
     Returns:
         Average loss for the epoch
     """
     model.train()
-    running_loss = 0.0
+    # Accumulate on the device so each batch does not force a host sync
+    running_loss = torch.zeros((), device=device)
+    amp_dtype = autocast_dtype(device)
     
-    for batch_idx, (data, target) in enumerate(tqdm(train_loader, desc="Training")):
-        data, target = data.to(device), target.to(device)
-        
-        optimizer.zero_grad()
-        output = model(data)
-        loss = criterion(output, target)
-        loss.backward()
-        optimizer.step()
+    for data, target in device_batches(progress_bar(train_loader, "Training"), device):
+        # Drop the gradients instead of zero-filling them; backward reallocates
+        optimizer.zero_grad(set_to_none=True)
+        with torch.autocast(torch.device(device).type, dtype=amp_dtype, enabled=amp_dtype is not None):
+            output = model(data)
+        # Loss in float32 regardless of the forward precision
+        loss = criterion(output.float(), target)
+        if scaler is not None:
+            scaler.scale(loss).backward()
+            scaler.step(optimizer)
+            scaler.update()
+        else:
+            loss.backward()
+            optimizer.step()
         
-        running_loss += loss.item()
+        running_loss += loss.detach()
     
-    return running_loss / len(train_loader)
+    return running_loss.item() / len(train_loader)
 
 
 def evaluate_model(model, test_loader, criterion, device):
@@ -88,43 +240,52 @@ def evaluate_model(model, test_loader, criterion, device):
         device: Device to evaluate on
         
     Returns:
-        test_loss, accuracy, predictions, true_labels
+        test_loss, accuracy, predictions, true_labels, confusion matrix
     """
     model.eval()
-    test_loss = 0.0
-    correct = 0
-    all_preds = []
-    all_labels = []
+    # Accumulators and outputs stay on the device; one transfer at the end
+    num_samples = len(test_loader.dataset)
+    num_classes = NUM_CLASSES
+    test_loss = torch.zeros((), device=device)
+    # Flattened confusion matrix indexed by true * num_classes + pred
+    cm_counts = torch.zeros(num_classes * num_classes, dtype=torch.long, device=device)
+    all_preds = torch.empty(num_samples, dtype=torch.long, device=device)
+    all_labels = torch.empty(num_samples, dtype=torch.long, device=device)
+    seen = 0
+    amp_dtype = autocast_dtype(device)
     
     with torch.no_grad():
-        for data, target in tqdm(test_loader, desc="Evaluating"):
-            data, target = data.to(device), target.to(device)
-            output = model(data)
-            test_loss += criterion(output, target).item()
+        for data, target in device_batches(progress_bar(test_loader, "Evaluating"), device):
+            with torch.autocast(torch.device(device).type, dtype=amp_dtype, enabled=amp_dtype is not None):
+                output = model(data)
+            output = output.float()
+            test_loss += criterion(output, target)
             
-            pred = output.argmax(dim=1, keepdim=True)
-            correct += pred.eq(target.view_as(pred)).sum().item()
+            pred = output.argmax(dim=1)
+            cm_counts += torch.bincount(target * num_classes + pred, minlength=num_classes * num_classes)
             
-            all_preds.extend(pred.cpu().numpy())
-            all_labels.extend(target.cpu().numpy())
+            batch_size = target.size(0)
+            all_preds[seen:seen + batch_size] = pred
+            all_labels[seen:seen + batch_size] = target
+            seen += batch_size
     
-    test_loss /= len(test_loader)
-    accuracy = 100. * correct / len(test_loader.dataset)
+    test_loss = test_loss.item() / len(test_loader)
+    cm = cm_counts.view(num_classes, num_classes).cpu().numpy()
+    accuracy = 100. * np.trace(cm) / num_samples
+    # Predictions and labels come back to the host in a single copy
+    preds, labels = torch.stack((all_preds[:seen], all_labels[:seen])).cpu().numpy()
     
-    return test_loss, accuracy, np.array(all_preds).flatten(), np.array(all_labels)
+    return test_loss, accuracy, preds, labels, cm
 
 
-def plot_confusion_matrix(y_true, y_pred, save_path='confusion_matrix.png'):
+def plot_confusion_matrix(cm, save_path='confusion_matrix.png'):
     """
     Plot and save confusion matrix
     
     Args:
-        y_true: True labels
-        y_pred: Predicted labels
+        cm: Confusion matrix counts (rows are true labels) from evaluate_model
         save_path: Path to save plot
     """
-    cm = confusion_matrix(y_true, y_pred)
-    
     plt.figure(figsize=(10, 8))
     sns.heatmap(cm, annot=True, fmt='d', cmap='Blues')
     plt.title('Confusion Matrix')
@@ -137,6 +298,66 @@ def plot_confusion_matrix(y_true, y_pred, save_path='confusion_matrix.png'):
     return save_path
 
 
+def scores_from_confusion(cm):
+    """
+    Per-class precision, recall and F1 from a confusion matrix
+    
+    Classes with no predictions (or no samples) score 0, matching sklearn's
+    zero_division default.
+    
+    Args:
+        cm: Confusion matrix counts (rows are true labels)
+        
+    Returns:
+        Tuple of float64 arrays (precision, recall, f1) and the int
+        per-class support
+    """
+    cm = np.asarray(cm)
+    tp = np.diag(cm).astype(np.float64)
+    predicted = cm.sum(axis=0)
+    support = cm.sum(axis=1)
+    precision = np.divide(tp, predicted, out=np.zeros_like(tp), where=predicted > 0)
+    recall = np.divide(tp, support, out=np.zeros_like(tp), where=support > 0)
+    denom = precision + recall
+    f1 = np.divide(2 * precision * recall, denom, out=np.zeros_like(tp), where=denom > 0)
+    return precision, recall, f1, support
+
+
+def classification_summary(cm, digits=2):
+    """
+    Format per-class precision, recall and F1 from a confusion matrix
+    
+    Equivalent to sklearn's classification_report, but computed directly from
+    the counts evaluate_model already has instead of re-scanning every label.
+    Classes with no predictions (or no samples) score 0.
+    
+    Args:
+        cm: Confusion matrix counts (rows are true labels)
+        digits: Decimal places for the scores
+        
+    Returns:
+        Report text
+    """
+    cm = np.asarray(cm)
+    precision, recall, f1, support = scores_from_confusion(cm)
+    total = support.sum()
+    weights = support / total if total else np.zeros_like(precision)
+    
+    width = max(len("weighted avg"), digits)
+    lines = [f"{'':>{width}} {'precision':>9} {'recall':>9} {'f1-score':>9} {'support':>9}", ""]
+    for label in range(len(cm)):
+        lines.append(f"{label:>{width}} {precision[label]:>9.{digits}f} {recall[label]:>9.{digits}f} "
+                     f"{f1[label]:>9.{digits}f} {support[label]:>9}")
+    lines.append("")
+    accuracy = np.trace(cm) / total if total else 0.0
+    lines.append(f"{'accuracy':>{width}} {'':>9} {'':>9} {accuracy:>9.{digits}f} {total:>9}")
+    lines.append(f"{'macro avg':>{width}} {precision.mean():>9.{digits}f} {recall.mean():>9.{digits}f} "
+                 f"{f1.mean():>9.{digits}f} {total:>9}")
+    lines.append(f"{'weighted avg':>{width}} {precision @ weights:>9.{digits}f} {recall @ weights:>9.{digits}f} "
+                 f"{f1 @ weights:>9.{digits}f} {total:>9}")
+    return "\n".join(lines) + "\n"
+
+
 def plot_training_curves(train_losses, test_losses, test_accuracies, save_path='training_curves.png'):
     """
     Plot training curves
@@ -175,7 +396,8 @@ def plot_training_curves(train_losses, test_losses, test_accuracies, save_path='
 
 
 
-def train_model(epochs=5, batch_size=64, learning_rate=0.001, experiment_name="cat_dogs_baseline", data_dir='data/raw/cat_dogs'):
+def train_model(epochs=5, batch_size=64, learning_rate=0.001, experiment_name="cat_dogs_baseline", data_dir='data/raw/cat_dogs', cache_dir=None,
+                compile_model=False, preload_to_device=False):
     """
     Complete training pipeline with MLflow tracking for Cat/Dogs
     Args:
@@ -184,8 +406,17 @@ def train_model(epochs=5, batch_size=64, learning_rate=0.001, experiment_name="c
         learning_rate: Learning rate
         experiment_name: MLflow experiment name
         data_dir: Directory for cat/dogs data
+        cache_dir: If set, decode and resize the images once into uint8 shards
+            in this directory and train from those instead of the JPEG files
+        compile_model: Train through torch.compile (fused kernels, slower first epoch)
+        preload_to_device: Hold both splits in device memory and batch them by
+            indexing instead of using DataLoader workers
     """
-    from src.data_preprocessing import load_cat_dogs_data, create_data_loaders
+    from src.data_preprocessing import (
+        load_cat_dogs_data, load_cat_dogs_cached, create_data_loaders, create_device_loaders
+    )
+    if epochs < 1:
+        raise ValueError(f"epochs must be at least 1, got {epochs}")
     mlflow.set_experiment(experiment_name)
     with mlflow.start_run():
         mlflow.log_param("epochs", epochs)
@@ -195,38 +426,63 @@ def train_model(epochs=5, batch_size=64, learning_rate=0.001, experiment_name="c
         device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         print(f"Using device: {device}")
         mlflow.log_param("device", str(device))
+        if device.type == 'cuda':
+            # Input shapes are fixed, so autotuned conv algorithms stay valid;
+            # TF32 runs float32 convs/GEMMs on tensor cores (Ampere and newer)
+            torch.backends.cudnn.benchmark = True
+            torch.backends.cudnn.allow_tf32 = True
+            torch.set_float32_matmul_precision('high')
         print("Loading Cat/Dogs dataset...")
-        train_dataset, val_dataset = load_cat_dogs_data(data_dir)
-        train_loader, val_loader = create_data_loaders(train_dataset, val_dataset, batch_size=batch_size)
-        model = CatDogsCNN().to(device)
+        # Workers hand over uint8 images; scaling and normalization run on the device
+        if cache_dir:
+            train_dataset, val_dataset = load_cat_dogs_cached(data_dir, cache_dir)
+        else:
+            train_dataset, val_dataset = load_cat_dogs_data(data_dir, normalize=False)
+        if preload_to_device:
+            train_loader, val_loader = create_device_loaders(train_dataset, val_dataset, batch_size, device)
+        else:
+            train_loader, val_loader = create_data_loaders(train_dataset, val_dataset, batch_size=batch_size)
+        # NHWC conv kernels avoid layout shuffles around every 3x3 conv
+        model = CatDogsCNN().to(device, memory_format=torch.channels_last)
+        # The compiled wrapper shares parameters with model, which is what gets saved
+        if compile_model:
+            enable_compile_cache()
+        train_net = torch.compile(model) if compile_model else model
+        mlflow.log_param("compiled", compile_model)
         criterion = nn.CrossEntropyLoss()
         optimizer = optim.Adam(model.parameters(), lr=learning_rate)
+        # bfloat16 has float32's range; float16 gradients need loss scaling
+        amp_dtype = autocast_dtype(device)
+        mlflow.log_param("autocast_dtype", str(amp_dtype) if amp_dtype else "float32")
+        scaler = torch.amp.GradScaler('cuda') if amp_dtype == torch.float16 else None
         train_losses = []
         val_losses = []
         val_accuracies = []
         print(f"\nTraining for {epochs} epochs...")
         for epoch in range(1, epochs + 1):
             print(f"\nEpoch {epoch}/{epochs}")
-            train_loss = train_epoch(model, train_loader, criterion, optimizer, device)
+            train_loss = train_epoch(train_net, train_loader, criterion, optimizer, device, scaler)
             train_losses.append(train_loss)
-            val_loss, accuracy, preds, labels = evaluate_model(model, val_loader, criterion, device)
+            val_loss, accuracy, preds, labels, cm = evaluate_model(train_net, val_loader, criterion, device)
             val_losses.append(val_loss)
             val_accuracies.append(accuracy)
             print(f"Train Loss: {train_loss:.4f}, Val Loss: {val_loss:.4f}, Accuracy: {accuracy:.2f}%")
-            mlflow.log_metric("train_loss", train_loss, step=epoch)
-            mlflow.log_metric("val_loss", val_loss, step=epoch)
-            mlflow.log_metric("val_accuracy", accuracy, step=epoch)
+            # One store call per epoch rather than one per metric
+            mlflow.log_metrics({
+                "train_loss": train_loss,
+                "val_loss": val_loss,
+                "val_accuracy": accuracy
+            }, step=epoch)
         print("\nGenerating final metrics and artifacts...")
-        val_loss, accuracy, preds, labels = evaluate_model(model, val_loader, criterion, device)
-        mlflow.log_metric("final_accuracy", accuracy)
-        mlflow.log_metric("final_val_loss", val_loss)
-        cm_path = plot_confusion_matrix(labels, preds, 'confusion_matrix.png')
+        # The last epoch's evaluation already scored the final weights
+        mlflow.log_metrics({"final_accuracy": accuracy, "final_val_loss": val_loss})
+        cm_path = plot_confusion_matrix(cm, 'confusion_matrix.png')
         mlflow.log_artifact(cm_path)
         os.remove(cm_path)
         curves_path = plot_training_curves(train_losses, val_losses, val_accuracies, 'training_curves.png')
         mlflow.log_artifact(curves_path)
         os.remove(curves_path)
-        report = classification_report(labels, preds)
+        report = classification_summary(cm)
         print("\nClassification Report:")
         print(report)
         with open("classification_report.txt", "w") as f:
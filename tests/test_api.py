@@ -5,6 +5,7 @@ Tests API endpoints and functionality
 import pytest
 from fastapi.testclient import TestClient
 import numpy as np
+import json
 from unittest.mock import Mock, patch, MagicMock
 
 
@@ -148,6 +149,175 @@ class TestPredictEndpoint:
         
         assert response.status_code == 422  # Validation error
 
+    def test_predict_base64_image(self, client, mock_model_inference):
+        """Test prediction with base64 encoded float32 bytes"""
+        import base64
+        image = np.random.rand(28, 28).astype(np.float32)
+        payload = {
+            "image_b64": base64.b64encode(image.tobytes()).decode(),
+            "shape": [28, 28],
+            "dtype": "float32"
+        }
+
+        with patch('api.main.model_inference', mock_model_inference):
+            response = client.post("/predict", json=payload)
+
+            assert response.status_code == 200
+            sent = mock_model_inference.predict.call_args[0][0]
+            assert np.array_equal(sent, image)
+
+    def test_predict_base64_model_image_end_to_end(self, client, tmp_path):
+        """Test a base64 128x128x3 payload is served by the real model, with or without shape"""
+        import base64
+        import torch
+        from src.inference import ModelInference
+        from src.model import CatDogsCNN
+        model_path = tmp_path / "model.pt"
+        torch.save(CatDogsCNN().state_dict(), model_path)
+        inference = ModelInference(str(model_path))
+        image = np.random.rand(128, 128, 3).astype(np.float32)
+        encoded = base64.b64encode(image.tobytes()).decode()
+
+        with patch('api.main.model_inference', inference):
+            for payload in ({"image_b64": encoded, "shape": [128, 128, 3]}, {"image_b64": encoded}):
+                response = client.post("/predict", json=payload)
+
+                assert response.status_code == 200
+                data = response.json()
+                assert data['prediction'] == inference.predict(image)['prediction']
+                assert len(data['probabilities']) == 2
+
+    def test_predict_base64_shape_mismatch(self, client):
+        """Test base64 payload whose size does not match the declared shape"""
+        import base64
+        payload = {
+            "image_b64": base64.b64encode(np.zeros(100, dtype=np.float32).tobytes()).decode(),
+            "shape": [28, 28]
+        }
+
+        response = client.post("/predict", json=payload)
+
+        assert response.status_code == 422
+
+
+class TestPredictRawEndpoint:
+    """Test binary prediction endpoint"""
+
+    def test_predict_raw_success(self, client, mock_model_inference):
+        """Test prediction from raw float32 bytes"""
+        image = np.random.rand(128, 128, 3).astype('<f4')
+
+        with patch('api.main.model_inference', mock_model_inference):
+            response = client.post(
+                "/predict-raw",
+                content=image.tobytes(),
+                headers={"Content-Type": "application/octet-stream"}
+            )
+
+            assert response.status_code == 200
+            assert response.json()['prediction'] == 5
+
+            sent = mock_model_inference.predict.call_args[0][0]
+            assert sent.shape == (128, 128, 3)
+            assert np.array_equal(sent, image)
+
+    def test_predict_raw_wrong_size(self, client, mock_model_inference):
+        """Test raw prediction rejects payloads of the wrong length"""
+        with patch('api.main.model_inference', mock_model_inference):
+            response = client.post(
+                "/predict-raw",
+                content=np.zeros(784, dtype='<f4').tobytes(),
+                headers={"Content-Type": "application/octet-stream"}
+            )
+
+            assert response.status_code == 400
+
+
+class TestPredictU8Endpoint:
+    """Test 8-bit binary prediction endpoint"""
+
+    def test_predict_u8_success(self, client, mock_model_inference):
+        """Test prediction from raw uint8 pixel bytes"""
+        mock_model_inference.predict_u8.return_value = mock_model_inference.predict.return_value
+        pixels = np.random.randint(0, 256, (128, 128, 3), dtype=np.uint8)
+
+        with patch('api.main.model_inference', mock_model_inference):
+            response = client.post(
+                "/predict-u8",
+                content=pixels.tobytes(),
+                headers={"Content-Type": "application/octet-stream"}
+            )
+
+            assert response.status_code == 200
+            assert response.json()['prediction'] == 5
+
+            sent = mock_model_inference.predict_u8.call_args[0][0]
+            assert sent.dtype == np.uint8
+            assert np.array_equal(sent, pixels)
+
+    def test_predict_u8_wrong_size(self, client, mock_model_inference):
+        """Test 8-bit prediction rejects float32-sized payloads"""
+        with patch('api.main.model_inference', mock_model_inference):
+            response = client.post(
+                "/predict-u8",
+                content=np.zeros((128, 128, 3), dtype='<f4').tobytes(),
+                headers={"Content-Type": "application/octet-stream"}
+            )
+
+            assert response.status_code == 400
+
+
+class TestPredictImageEndpoint:
+    """Test base64 image prediction endpoint"""
+
+    def test_predict_image_success(self, client, mock_model_inference):
+        """Test uploaded image is resized and scaled to [0, 1] float32"""
+        from PIL import Image
+        import base64
+        import io
+
+        buffer = io.BytesIO()
+        pixels = np.random.randint(0, 256, (300, 200, 3), dtype=np.uint8)
+        Image.fromarray(pixels).save(buffer, format="PNG")
+        encoded = base64.b64encode(buffer.getvalue()).decode()
+
+        with patch('api.main.model_inference', mock_model_inference):
+            response = client.post("/predict-image", json={"image": encoded})
+
+            assert response.status_code == 200
+            assert response.json()['prediction'] == 5
+
+            sent = mock_model_inference.predict.call_args[0][0]
+            assert sent.shape == (128, 128, 3)
+            assert sent.dtype == np.float32
+            assert sent.min() >= 0.0 and sent.max() <= 1.0
+
+    def test_predict_image_invalid_base64(self, client, mock_model_inference):
+        """Test invalid base64 data is rejected"""
+        with patch('api.main.model_inference', mock_model_inference):
+            response = client.post("/predict-image", json={"image": "not base64!"})
+
+            assert response.status_code == 400
+
+
+class TestModelInfoEndpoint:
+    """Test model info endpoint"""
+
+    def test_model_info_uses_cached_summary(self, client, mock_model_inference):
+        """Test parameter counts are computed once and then reused"""
+        import torch
+        mock_model_inference.model.parameters.side_effect = lambda: iter([torch.nn.Parameter(torch.zeros(3, 4))])
+
+        with patch('api.main.model_inference', mock_model_inference), \
+                patch('api.main.model_summary', None):
+            first = client.get("/model-info").json()
+            second = client.get("/model-info").json()
+
+            assert first['model_loaded'] is True
+            assert first['total_parameters'] == "12"
+            assert second['trainable_parameters'] == "12"
+            assert mock_model_inference.model.parameters.call_count == 2
+
 
 class TestMetricsEndpoint:
     """Test metrics endpoint"""
@@ -161,6 +331,17 @@ class TestMetricsEndpoint:
         assert 'text/plain' in response.headers['content-type'] or \
                'text/plain; version=0.0.4' in response.headers['content-type']
 
+    def test_metrics_output_is_cached(self, client):
+        """Test scrapes within the TTL reuse the rendered output"""
+        with patch('api.main.METRICS_CACHE_TTL', 60.0), \
+                patch('api.main.metrics_cache', {"generated_at": float("-inf"), "body": b""}), \
+                patch('api.main.generate_latest', return_value=b"cached 1\n") as mock_generate:
+            first = client.get("/metrics")
+            second = client.get("/metrics")
+
+            assert first.content == second.content == b"cached 1\n"
+            assert mock_generate.call_count == 1
+
 
 class TestStatsEndpoint:
     """Test statistics endpoint"""
@@ -173,6 +354,60 @@ class TestStatsEndpoint:
         data = response.json()
         assert 'total_predictions' in data
 
+    def test_stats_track_predictions(self, client, mock_model_inference):
+        """Test stats reflect predictions made through the API"""
+        before = client.get("/stats").json()['total_predictions']
+        image = np.random.rand(28, 28).tolist()
+
+        with patch('api.main.model_inference', mock_model_inference):
+            client.post("/predict", json={"image": image})
+
+        data = client.get("/stats").json()
+
+        assert data['total_predictions'] == before + 1
+        assert 0.0 < data['average_confidence'] <= 1.0
+
+    def test_stats_read_aggregated_registry(self, client):
+        """Test stats come from the registry /metrics serves (all workers in multiprocess mode)"""
+        from prometheus_client import CollectorRegistry, Counter
+        registry = CollectorRegistry()
+        predictions = Counter('predictions_total', 'Predictions', ['predicted_class'], registry=registry)
+        confidence = Counter('prediction_confidence_sum', 'Confidence sum', registry=registry)
+        inference_time = Counter('prediction_inference_time_ms_sum', 'Time sum', registry=registry)
+        predictions.labels(predicted_class='0').inc(3)
+        predictions.labels(predicted_class='1').inc(1)
+        confidence.inc(3.2)
+        inference_time.inc(20.0)
+
+        with patch('api.main.METRICS_REGISTRY', registry):
+            data = client.get("/stats").json()
+
+        assert data['total_predictions'] == 4
+        assert data['average_confidence'] == pytest.approx(0.8)
+        assert data['average_inference_time_ms'] == pytest.approx(5.0)
+
+
+class TestPredictionLog:
+    """Test buffered prediction logging"""
+
+    def test_log_is_buffered_until_flush(self, tmp_path):
+        """Test predictions are only written to disk when flushed"""
+        from api import main
+        log_file = tmp_path / "predictions.jsonl"
+
+        with patch('api.main.PREDICTION_LOG_FILE', str(log_file)):
+            main.prediction_log_buffer.clear()
+            main.log_prediction_to_file(prediction=1, confidence=0.9, inference_time_ms=2.0)
+            main.log_prediction_to_file(prediction=0, confidence=0.6, inference_time_ms=4.0)
+
+            assert not log_file.exists()
+            assert main.flush_prediction_log() == 2
+            assert len(main.prediction_log_buffer) == 0
+
+            lines = log_file.read_text().splitlines()
+            assert len(lines) == 2
+            assert json.loads(lines[0])['prediction'] == 1
+
 
 class TestRequestValidation:
     """Test request validation"""
@@ -46,11 +46,9 @@ class TestModelInference:
     
     @patch('src.inference.CatDogsCNN')
     @patch('src.inference.torch.load')
-    @patch('src.inference.os.path.exists')
-    def test_model_loading(self, mock_exists, mock_torch_load, mock_cnn):
+    def test_model_loading(self, mock_torch_load, mock_cnn):
         """Test model loading"""
         # Setup mocks
-        mock_exists.return_value = True
         mock_model = MagicMock()
         mock_cnn.return_value = mock_model
         mock_torch_load.return_value = {}
@@ -65,10 +63,8 @@ class TestModelInference:
     
     @patch('src.inference.CatDogsCNN')
     @patch('src.inference.torch.load')
-    @patch('src.inference.os.path.exists')
-    def test_is_loaded(self, mock_exists, mock_torch_load, mock_cnn):
+    def test_is_loaded(self, mock_torch_load, mock_cnn):
         """Test is_loaded method"""
-        mock_exists.return_value = True
         mock_model = MagicMock()
         mock_cnn.return_value = mock_model
         mock_torch_load.return_value = {}
@@ -79,12 +75,10 @@ class TestModelInference:
     
     @patch('src.inference.CatDogsCNN')
     @patch('src.inference.torch.load')
-    @patch('src.inference.os.path.exists')
     @patch('src.inference.preprocess_image')
-    def test_predict(self, mock_preprocess, mock_exists, mock_torch_load, mock_cnn):
+    def test_predict(self, mock_preprocess, mock_torch_load, mock_cnn):
         """Test prediction method"""
         # Setup mocks
-        mock_exists.return_value = True
         mock_model = MagicMock()
         
         # Make .to() and .eval() return the mock itself for method chaining
@@ -122,10 +116,8 @@ class TestModelInference:
     
     @patch('src.inference.CatDogsCNN')
     @patch('src.inference.torch.load')
-    @patch('src.inference.os.path.exists')
-    def test_predict_without_loaded_model(self, mock_exists, mock_torch_load, mock_cnn):
+    def test_predict_without_loaded_model(self, mock_torch_load, mock_cnn):
         """Test prediction fails when model not loaded"""
-        mock_exists.return_value = True
         mock_cnn.return_value = MagicMock()
         mock_torch_load.return_value = {}
         
@@ -136,6 +128,45 @@ class TestModelInference:
             inference.predict('dummy_path.jpg')
 
 
+    @patch('src.inference.torch.load')
+    def test_predict_batch_matches_predict(self, mock_torch_load, tmp_path):
+        """Test batched prediction gives the same results as one image at a time"""
+        from PIL import Image
+        from src.model import CatDogsCNN
+        mock_torch_load.return_value = CatDogsCNN().state_dict()
+        inference = ModelInference(model_path='test_model.pt')
+
+        image_paths = []
+        for i in range(5):
+            path = tmp_path / f"img{i}.png"
+            Image.fromarray(np.random.randint(0, 255, (96, 96, 3), dtype=np.uint8)).save(path)
+            image_paths.append(str(path))
+
+        results = inference.predict_batch(image_paths, max_batch=2)
+
+        assert len(results) == 5
+        for path, result in zip(image_paths, results):
+            expected = inference.predict(path)
+            assert result['prediction'] == expected['prediction']
+            assert np.allclose(result['probabilities'], expected['probabilities'], atol=1e-5)
+        assert inference.predict_batch([]) == []
+
+    @pytest.mark.skipif(torch.cuda.is_available(), reason="quantization only applies on CPU")
+    @patch('src.inference.torch.load')
+    def test_quantized_model_matches_fp32(self, mock_torch_load):
+        """Test int8 dynamic quantization keeps predictions close to the fp32 model"""
+        from src.model import CatDogsCNN
+        state_dict = CatDogsCNN().state_dict()
+        mock_torch_load.side_effect = lambda *args, **kwargs: {k: v.clone() for k, v in state_dict.items()}
+        fp32 = ModelInference(model_path='test_model.pt')
+        int8 = ModelInference(model_path='test_model.pt', quantize=True)
+
+        assert isinstance(int8.model.fc1, torch.ao.nn.quantized.dynamic.Linear)
+        image = np.random.rand(128, 128, 3).astype(np.float32)
+        assert np.allclose(int8.predict(image)['probabilities'],
+                           fp32.predict(image)['probabilities'], atol=1e-2)
+
+
 class TestPredictionFunctions:
     """Test helper prediction functions"""
     
@@ -196,11 +227,9 @@ class TestPredictionOutput:
     
     @patch('src.inference.CatDogsCNN')
     @patch('src.inference.torch.load')
-    @patch('src.inference.os.path.exists')
     @patch('src.inference.preprocess_image')
-    def test_prediction_output_range(self, mock_preprocess, mock_exists, mock_torch_load, mock_cnn):
+    def test_prediction_output_range(self, mock_preprocess, mock_torch_load, mock_cnn):
         """Test that prediction is in valid range (0-9)"""
-        mock_exists.return_value = True
         mock_model = MagicMock()
         
         # Make .to() and .eval() return the mock itself for method chaining
@@ -224,11 +253,9 @@ class TestPredictionOutput:
     
     @patch('src.inference.CatDogsCNN')
     @patch('src.inference.torch.load')
-    @patch('src.inference.os.path.exists')
     @patch('src.inference.preprocess_image')
-    def test_probabilities_sum_to_one(self, mock_preprocess, mock_exists, mock_torch_load, mock_cnn):
+    def test_probabilities_sum_to_one(self, mock_preprocess, mock_torch_load, mock_cnn):
         """Test that probabilities sum to approximately 1.0"""
-        mock_exists.return_value = True
         mock_model = MagicMock()
         
         # Make .to() and .eval() return the mock itself for method chaining
@@ -254,11 +281,9 @@ class TestPredictionOutput:
     
     @patch('src.inference.CatDogsCNN')
     @patch('src.inference.torch.load')
-    @patch('src.inference.os.path.exists')
     @patch('src.inference.preprocess_image')
-    def test_confidence_matches_max_probability(self, mock_preprocess, mock_exists, mock_torch_load, mock_cnn):
+    def test_confidence_matches_max_probability(self, mock_preprocess, mock_torch_load, mock_cnn):
         """Test that confidence equals max probability"""
-        mock_exists.return_value = True
         mock_model = MagicMock()
         
         # Make .to() and .eval() return the mock itself for method chaining
@@ -7,12 +7,21 @@ import numpy as np
 import torch
 from src.data_preprocessing import (
     preprocess_image,
+    get_image_transform,
     load_cat_dogs_data,
+    load_cat_dogs_split,
     create_data_loaders,
+    verify_images,
+    load_cat_dogs_cached,
+    save_processed_data,
+    load_processed_data,
     flatten_image,
     normalize_pixel_values
 )
 
+# Seeded generator shared by the tests so failures reproduce run to run
+rng = np.random.default_rng(0)
+
 
 class TestPreprocessImage:
     """Test image preprocessing function for Cat/Dogs"""
@@ -20,7 +29,7 @@ class TestPreprocessImage:
         from PIL import Image
         import numpy as np
         # Create a dummy RGB image and save
-        img = Image.fromarray(np.random.randint(0, 255, (128, 128, 3), dtype=np.uint8))
+        img = Image.fromarray(rng.integers(0, 255, (128, 128, 3), dtype=np.uint8))
         img_path = tmp_path / "test.jpg"
         img.save(img_path)
         # Preprocess
@@ -28,6 +37,135 @@ class TestPreprocessImage:
         # Check output shape
         assert result.shape == (1, 3, 128, 128), f"Expected shape (1, 3, 128, 128), got {result.shape}"
         assert isinstance(result, torch.Tensor)
+        assert result.is_contiguous(memory_format=torch.channels_last)
+
+    def test_preprocess_uint8_array_matches_file(self, tmp_path):
+        """Test uint8 arrays, model-sized or not, preprocess like the same image on disk"""
+        from PIL import Image
+        for shape in [(128, 128, 3), (90, 160, 3)]:
+            pixels = rng.integers(0, 256, shape, dtype=np.uint8)
+            img_path = tmp_path / "array.png"
+            Image.fromarray(pixels).save(img_path)
+
+            result = preprocess_image(pixels)
+
+            assert result.shape == (1, 3, 128, 128)
+            assert torch.equal(result, preprocess_image(str(img_path)))
+
+        with pytest.raises(ValueError):
+            preprocess_image(np.zeros((128, 128, 3), dtype=np.float32))
+
+    def test_load_rgb_image_draft_decode(self, tmp_path):
+        """Test large JPEGs are decoded at a reduced scale no smaller than the target"""
+        from PIL import Image
+        from src.data_preprocessing import load_rgb_image
+        img_path = tmp_path / "large.jpg"
+        Image.fromarray(rng.integers(0, 255, (600, 800, 3), dtype=np.uint8)).save(img_path)
+
+        image = load_rgb_image(str(img_path), img_size=128)
+
+        assert image.mode == 'RGB'
+        assert 128 <= min(image.size) and image.size[0] < 800
+        assert load_rgb_image(str(img_path)).size == (800, 600)
+
+    def test_reducing_resize_close_to_bilinear(self):
+        """Test box-reduced downscaling stays close to a plain bilinear resize"""
+        from PIL import Image
+        from src.data_preprocessing import ReducingResize
+        gradient = np.linspace(0, 255, 1200, dtype=np.float32)
+        pixels = np.stack([np.tile(gradient, (900, 1))] * 3, axis=-1).astype(np.uint8)
+        img = Image.fromarray(pixels)
+
+        result = ReducingResize(128)(img)
+        expected = img.resize((128, 128), Image.BILINEAR)
+
+        assert result.size == (128, 128)
+        assert np.abs(np.asarray(result, dtype=np.int16) - np.asarray(expected, dtype=np.int16)).max() <= 2
+
+    def test_transform_is_reused(self):
+        """Test the preprocessing pipeline is built once per image size"""
+        assert get_image_transform(128) is get_image_transform(128)
+        assert get_image_transform(64) is not get_image_transform(128)
+
+    def test_normalize_constants_cached(self, tmp_path, monkeypatch):
+        """Test batch normalization reuses cached constants instead of building tensors per call"""
+        from PIL import Image
+        from src.data_preprocessing import preprocess_images_batch
+        path = tmp_path / "test.png"
+        Image.fromarray(rng.integers(0, 256, (128, 128, 3), dtype=np.uint8)).save(path)
+        expected = preprocess_images_batch([str(path)])
+
+        def no_tensor(*args, **kwargs):
+            raise AssertionError("normalization constants rebuilt per call")
+
+        monkeypatch.setattr(torch, "tensor", no_tensor)
+        result = preprocess_images_batch([str(path)])
+
+        assert torch.equal(result, expected)
+
+    def test_normalize_batch_matches_lut_and_keeps_input(self):
+        """Test batch normalization of uint8 and [0, 1] float input matches the per-image path"""
+        from src.data_preprocessing import LUTNormalize, normalize_batch
+        pixels = rng.integers(0, 256, (2, 3, 16, 16), dtype=np.uint8)
+        expected = torch.stack([LUTNormalize()(image.transpose(1, 2, 0)) for image in pixels])
+        floats = torch.from_numpy(pixels).float() / 255.0
+        original = floats.clone()
+
+        assert torch.allclose(normalize_batch(torch.from_numpy(pixels)), expected, atol=1e-6)
+        assert torch.allclose(normalize_batch(floats, max_value=1.0), expected, atol=1e-5)
+        assert torch.equal(floats, original)
+
+    def test_lut_normalize_matches_torchvision(self):
+        """Test the lookup-table normalization matches ToTensor + Normalize"""
+        from PIL import Image
+        from torchvision import transforms
+        from src.data_preprocessing import LUTNormalize, IMAGENET_MEAN, IMAGENET_STD
+        img = Image.fromarray(rng.integers(0, 256, (64, 48, 3), dtype=np.uint8))
+        expected = transforms.Normalize(IMAGENET_MEAN, IMAGENET_STD)(transforms.ToTensor()(img))
+
+        result = LUTNormalize()(img)
+
+        assert result.dtype == torch.float32
+        assert torch.allclose(result, expected, atol=1e-6)
+
+    def test_uint8_transform_matches_normalized(self):
+        """Test device-side normalization of uint8 samples matches the CPU pipeline"""
+        from PIL import Image
+        from src.model import to_model_input
+        img = Image.fromarray(rng.integers(0, 256, (150, 200, 3), dtype=np.uint8))
+
+        raw = get_image_transform(128, normalize=False)(img)
+        expected = get_image_transform(128)(img).unsqueeze(0)
+        result = to_model_input(raw.unsqueeze(0), torch.device('cpu'))
+
+        assert raw.dtype == torch.uint8
+        assert raw.shape == (3, 128, 128)
+        assert torch.allclose(result, expected, atol=1e-6)
+
+    def test_preprocess_images_batch_matches_single(self, tmp_path):
+        """Test batched preprocessing matches preprocessing each image alone"""
+        from PIL import Image
+        from src.data_preprocessing import preprocess_images_batch
+        paths = []
+        for i, size in enumerate([(150, 200), (128, 128), (300, 90)]):
+            path = tmp_path / f"img{i}.png"
+            Image.fromarray(rng.integers(0, 256, size + (3,), dtype=np.uint8)).save(path)
+            paths.append(str(path))
+
+        batch = preprocess_images_batch(paths)
+        raw = preprocess_images_batch(paths, normalize=False)
+
+        assert batch.shape == (3, 3, 128, 128)
+        assert batch.is_contiguous(memory_format=torch.channels_last)
+        assert raw.dtype == torch.uint8
+        expected = torch.cat([preprocess_image(path) for path in paths])
+        assert torch.allclose(batch, expected, atol=1e-5)
+
+    def test_preprocess_images_batch_rejects_empty(self):
+        """Test an empty path list raises a clear error"""
+        from src.data_preprocessing import preprocess_images_batch
+        with pytest.raises(ValueError, match="at least one image"):
+            preprocess_images_batch([])
 
 
 class TestFlattenImage:
@@ -35,7 +173,7 @@ class TestFlattenImage:
     
     def test_flatten_2d_image(self):
         """Test flattening of 2D image"""
-        image = np.random.rand(28, 28)
+        image = rng.random((28, 28))
         
         result = flatten_image(image)
         
@@ -43,7 +181,7 @@ class TestFlattenImage:
     
     def test_flatten_3d_image(self):
         """Test flattening of 3D image with channel dimension"""
-        image = np.random.rand(1, 28, 28)
+        image = rng.random((1, 28, 28))
         
         result = flatten_image(image)
         
@@ -51,33 +189,44 @@ class TestFlattenImage:
     
     def test_flatten_already_flattened(self):
         """Test flattening of already flattened image"""
-        image = np.random.rand(784)
+        image = rng.random((784,))
         
         result = flatten_image(image)
         
         assert result.shape == (784,), f"Expected shape (784,), got {result.shape}"
     
-    def test_flatten_preserves_values(self):
-        """Test that flattening preserves values"""
+    @pytest.mark.parametrize("mode", ["view", "copy"])
+    def test_flatten_preserves_values(self, mode):
+        """Test that flattening preserves values (without a copy when contiguous)"""
         image = np.arange(784).reshape(28, 28)
+        if mode == "copy":
+            image = image.T
         
         result = flatten_image(image)
         
-        assert np.array_equal(result, np.arange(784)), "Flattening changed values"
+        assert result.shape == (784,)
+        if mode == "view":
+            # A unit-stride view of the same buffer holds the same values in order
+            assert result.ctypes.data == image.ctypes.data
+            assert result.strides == (image.itemsize,)
+        else:
+            assert np.array_equal(result, image.reshape(-1)), "Flattening changed values"
 
 
 class TestNormalizePixelValues:
     """Test pixel normalization function"""
     
-    def test_normalize_to_0_1(self):
-        """Test normalization to [0, 1] range"""
-        image = np.array([0, 128, 255])
+    @pytest.mark.parametrize("dtype", [np.int64, np.uint8])
+    def test_normalize_to_0_1(self, dtype):
+        """Test normalization to [0, 1] range (uint8 goes through the lookup table)"""
+        image = np.array([0, 128, 255], dtype=dtype)
         
         result = normalize_pixel_values(image, min_val=0.0, max_val=1.0)
         
+        assert result.dtype == np.float32
         assert result.min() == 0.0, "Minimum should be 0.0"
         assert result.max() == 1.0, "Maximum should be 1.0"
-        assert np.allclose(result[1], 0.5019607843137255, atol=1e-5), "Mid value incorrect"
+        assert result[1] == np.float32(128) / np.float32(255), "Mid value incorrect"
     
     def test_normalize_to_custom_range(self):
         """Test normalization to custom range"""
@@ -90,7 +239,7 @@ class TestNormalizePixelValues:
     
     def test_normalize_constant_image(self):
         """Test normalization of constant image (all same values)"""
-        image = np.ones((28, 28)) * 5.0
+        image = np.full((28, 28), 5.0, dtype=np.float32)
         
         result = normalize_pixel_values(image, min_val=0.0, max_val=1.0)
         
@@ -99,56 +248,158 @@ class TestNormalizePixelValues:
     
     def test_normalize_preserves_shape(self):
         """Test that normalization preserves shape"""
-        image = np.random.rand(28, 28)
+        image = rng.random((28, 28))
         
         result = normalize_pixel_values(image)
         
         assert result.shape == image.shape, "Shape should be preserved"
 
+    def test_normalize_uint8_image(self):
+        """Test uint8 images are normalized to float32 via the lookup table"""
+        image = rng.integers(0, 256, (32, 32, 3), dtype=np.uint8)
+        expected = (image - image.min()) / (image.max() - image.min())
+
+        result = normalize_pixel_values(image)
+
+        assert result.dtype == np.float32
+        assert np.allclose(result, expected, atol=1e-6)
+
+    def test_normalize_does_not_modify_input(self):
+        """Test float32 input is left untouched"""
+        image = rng.random((28, 28)).astype(np.float32) * 10
+        original = image.copy()
+
+        normalize_pixel_values(image, min_val=-1.0, max_val=1.0)
+
+        assert np.array_equal(image, original)
+
+
+@pytest.fixture(scope="module")
+def cat_dogs_dir(tmp_path_factory):
+    """Dummy cat_dogs directory with one JPEG per class and split, built once per module"""
+    from PIL import Image
+    data_dir = tmp_path_factory.mktemp("data") / "cat_dogs"
+    for split in ["train", "val"]:
+        for cls in ["cat", "dog"]:
+            (data_dir / split / cls).mkdir(parents=True)
+            img = Image.fromarray(rng.integers(0, 255, (128, 128, 3), dtype=np.uint8))
+            img.save(data_dir / split / cls / "img1.jpg")
+    return data_dir
+
 
 class TestDataLoading:
     """Test data loading functions for Cat/Dogs"""
     @pytest.mark.slow
-    def test_load_cat_dogs_data(self, tmp_path):
-        # Create dummy directory structure: cat and dog folders with one image each
-        import shutil
-        from PIL import Image
-        import numpy as np
-        data_dir = tmp_path / "cat_dogs"
-        train_dir = data_dir / "train"
-        val_dir = data_dir / "val"
-        (train_dir / "cat").mkdir(parents=True, exist_ok=True)
-        (train_dir / "dog").mkdir(parents=True, exist_ok=True)
-        (val_dir / "cat").mkdir(parents=True, exist_ok=True)
-        (val_dir / "dog").mkdir(parents=True, exist_ok=True)
-        # Create dummy images
-        for split in [train_dir, val_dir]:
-            for cls in ["cat", "dog"]:
-                img = Image.fromarray(np.random.randint(0, 255, (128, 128, 3), dtype=np.uint8))
-                img.save(split / cls / "img1.jpg")
+    def test_load_cat_dogs_data(self, cat_dogs_dir):
         # Call the data loader with the dummy directory
-        train_dataset, val_dataset = load_cat_dogs_data(data_dir=str(data_dir))
+        train_dataset, val_dataset = load_cat_dogs_data(data_dir=str(cat_dogs_dir))
         assert hasattr(train_dataset, '__len__')
         assert hasattr(val_dataset, '__len__')
-    @pytest.mark.slow
-    def test_create_data_loaders(self, tmp_path):
-        # Create dummy directory structure: cat and dog folders with one image each
+
+    def test_load_cat_dogs_split(self, tmp_path):
+        """Test loading one split only scans that split's directory"""
         from PIL import Image
-        import numpy as np
         data_dir = tmp_path / "cat_dogs"
-        train_dir = data_dir / "train"
-        val_dir = data_dir / "val"
-        (train_dir / "cat").mkdir(parents=True, exist_ok=True)
-        (train_dir / "dog").mkdir(parents=True, exist_ok=True)
-        (val_dir / "cat").mkdir(parents=True, exist_ok=True)
-        (val_dir / "dog").mkdir(parents=True, exist_ok=True)
-        # Create dummy images
-        for split in [train_dir, val_dir]:
+        for cls in ["cat", "dog"]:
+            (data_dir / "val" / cls).mkdir(parents=True, exist_ok=True)
+            img = Image.fromarray(rng.integers(0, 255, (128, 128, 3), dtype=np.uint8))
+            img.save(data_dir / "val" / cls / "img1.jpg")
+        # No train directory exists, so scanning it would fail
+        val_dataset = load_cat_dogs_split(data_dir=str(data_dir), split='val')
+        assert len(val_dataset) == 2
+        image, label = val_dataset[0]
+        assert image.shape == (3, 128, 128)
+    def test_verify_images_finds_corrupted(self, tmp_path):
+        """Test corrupted images are reported and optionally removed"""
+        from PIL import Image
+        good = tmp_path / "cat" / "good.jpg"
+        bad = tmp_path / "dog" / "bad.jpg"
+        good.parent.mkdir()
+        bad.parent.mkdir()
+        Image.fromarray(rng.integers(0, 255, (32, 32, 3), dtype=np.uint8)).save(good)
+        bad.write_bytes(good.read_bytes()[:100])
+        (tmp_path / "notes.txt").write_text("not an image")
+
+        assert verify_images(str(tmp_path)) == [str(bad)]
+        assert bad.exists()
+
+        verify_images(str(tmp_path), remove=True)
+        assert not bad.exists()
+        assert good.exists()
+    def test_cached_dataset_matches_image_folder(self, tmp_path):
+        """Test cache shards hold the same uint8 samples as decoding the files"""
+        from PIL import Image
+        data_dir = tmp_path / "cat_dogs"
+        for split in ["train", "val"]:
             for cls in ["cat", "dog"]:
-                img = Image.fromarray(np.random.randint(0, 255, (128, 128, 3), dtype=np.uint8))
-                img.save(split / cls / "img1.jpg")
+                (data_dir / split / cls).mkdir(parents=True)
+                img = Image.fromarray(rng.integers(0, 255, (90, 120, 3), dtype=np.uint8))
+                img.save(data_dir / split / cls / "img1.png")
+
+        train_cached, val_cached = load_cat_dogs_cached(str(data_dir), str(tmp_path / "cache"))
+        train_dataset, _ = load_cat_dogs_data(str(data_dir), normalize=False)
+
+        assert len(train_cached) == len(train_dataset) == 2
+        assert len(val_cached) == 2
+        for (cached, cached_label), (image, label) in zip(train_cached, train_dataset):
+            assert cached.dtype == torch.uint8
+            assert torch.equal(cached, image)
+            assert cached_label == label
+
+    def test_cached_dataset_rejects_fortran_order(self, tmp_path):
+        """Test cache shards must be row-major NHWC"""
+        from src.data_preprocessing import CachedImageDataset
+        images_path = tmp_path / "images.npy"
+        labels_path = tmp_path / "labels.npy"
+        np.save(images_path, np.asfortranarray(np.zeros((2, 8, 8, 3), dtype=np.uint8)))
+        np.save(labels_path, np.zeros(2, dtype=np.int64))
+
+        with pytest.raises(ValueError):
+            CachedImageDataset(str(images_path), str(labels_path))
+
+    def test_cached_dataset_pickles_by_path(self, tmp_path):
+        """Test workers receive the shard path, not a copy of the images"""
+        import pickle
+        from src.data_preprocessing import CachedImageDataset
+        images_path = tmp_path / "images.npy"
+        labels_path = tmp_path / "labels.npy"
+        images = rng.integers(0, 256, (16, 64, 64, 3), dtype=np.uint8)
+        np.save(images_path, images)
+        np.save(labels_path, np.arange(16, dtype=np.int64))
+        dataset = CachedImageDataset(str(images_path), str(labels_path))
+
+        payload = pickle.dumps(dataset)
+        restored = pickle.loads(payload)
+
+        assert len(payload) < images.nbytes // 10
+        assert isinstance(restored.images, np.memmap)
+        assert torch.equal(restored[3][0], dataset[3][0])
+        assert restored[3][1] == 3
+
+    def test_loader_batches_stay_uint8_until_device(self, tmp_path):
+        """Test cached batches cross the loader as uint8 and are normalized on the device"""
+        from src.data_preprocessing import CachedImageDataset, LUTNormalize
+        from src.model import to_model_input
+        images_path = tmp_path / "images.npy"
+        labels_path = tmp_path / "labels.npy"
+        images = rng.integers(0, 256, (4, 32, 32, 3), dtype=np.uint8)
+        np.save(images_path, images)
+        np.save(labels_path, np.zeros(4, dtype=np.int64))
+        dataset = CachedImageDataset(str(images_path), str(labels_path))
+        train_loader, _ = create_data_loaders(dataset, dataset, batch_size=4, num_workers=0)
+
+        batch, _ = next(iter(train_loader))
+        result = to_model_input(batch, torch.device('cpu'))
+
+        assert batch.dtype == torch.uint8
+        assert result.dtype == torch.float32
+        expected = torch.stack([LUTNormalize()(image.permute(1, 2, 0).numpy()) for image in batch])
+        assert torch.allclose(result, expected, atol=1e-6)
+
+    @pytest.mark.slow
+    def test_create_data_loaders(self, cat_dogs_dir):
         # Call the data loader with the dummy directory
-        train_dataset, val_dataset = load_cat_dogs_data(data_dir=str(data_dir))
+        train_dataset, val_dataset = load_cat_dogs_data(data_dir=str(cat_dogs_dir))
         train_loader, val_loader = create_data_loaders(train_dataset, val_dataset, batch_size=2)
         batch = next(iter(train_loader))
         images, labels = batch
@@ -157,34 +408,154 @@ class TestDataLoading:
         assert labels.shape[0] == 2, "Should have 2 labels"
 
 
+class TestDataLoaderConfig:
+    """Test DataLoader performance settings"""
+
+    def test_workers_enable_persistence_and_prefetch(self):
+        """Test worker loaders keep workers alive and prefetch ahead"""
+        dataset = torch.utils.data.TensorDataset(torch.zeros(4, 3, 8, 8), torch.zeros(4))
+        train_loader, test_loader = create_data_loaders(dataset, dataset, batch_size=2, num_workers=2, pin_memory=False)
+        for loader in (train_loader, test_loader):
+            assert loader.num_workers == 2
+            assert loader.persistent_workers is True
+            assert loader.prefetch_factor == 4
+
+    def test_no_workers(self):
+        """Test loaders without workers load in the main process"""
+        dataset = torch.utils.data.TensorDataset(torch.zeros(4, 3, 8, 8), torch.zeros(4))
+        train_loader, _ = create_data_loaders(dataset, dataset, batch_size=2, num_workers=0, pin_memory=False)
+        assert train_loader.num_workers == 0
+        assert train_loader.persistent_workers is False
+        assert train_loader.drop_last is True
+        images, _ = next(iter(train_loader))
+        assert images.shape == (2, 3, 8, 8)
+
+    def test_pin_memory_follows_cuda(self):
+        """Test loaders pin host memory (needed for async copies) whenever CUDA is used"""
+        from src.data_preprocessing import IS_MACOS
+        dataset = torch.utils.data.TensorDataset(torch.zeros(4, 3, 8, 8), torch.zeros(4))
+        train_loader, test_loader = create_data_loaders(dataset, dataset, batch_size=2, num_workers=0)
+        for loader in (train_loader, test_loader):
+            assert loader.pin_memory is (torch.cuda.is_available() and not IS_MACOS)
+
+        pinned, _ = create_data_loaders(dataset, dataset, batch_size=2, num_workers=0, pin_memory=True)
+        assert pinned.pin_memory is True
+
+
+class TestDeviceDataLoader:
+    """Test device-resident batch iteration"""
+
+    def test_batches_cover_dataset(self):
+        """Test every sample is yielded exactly once per epoch, shuffled or not"""
+        from torch.utils.data import TensorDataset
+        from src.data_preprocessing import DeviceDataLoader
+        images = torch.arange(10, dtype=torch.uint8).view(10, 1, 1, 1).expand(10, 3, 2, 2).contiguous()
+        dataset = TensorDataset(images, torch.arange(10))
+
+        for shuffle in (False, True):
+            loader = DeviceDataLoader(dataset, batch_size=4, shuffle=shuffle)
+            batches = list(loader)
+
+            assert len(loader) == len(batches) == 3
+            labels = torch.cat([labels for _, labels in batches])
+            assert sorted(labels.tolist()) == list(range(10))
+            for data, target in batches:
+                assert torch.equal(data[:, 0, 0, 0].long(), target)
+
+    def test_drop_last_keeps_full_batches(self):
+        """Test drop_last yields only full batches drawn from the whole dataset"""
+        from torch.utils.data import TensorDataset
+        from src.data_preprocessing import DeviceDataLoader
+        dataset = TensorDataset(torch.zeros(10, 3, 2, 2, dtype=torch.uint8), torch.arange(10))
+
+        loader = DeviceDataLoader(dataset, batch_size=4, shuffle=True, drop_last=True)
+        seen = set()
+        for _ in range(20):
+            batches = list(loader)
+            assert len(loader) == len(batches) == 2
+            assert all(len(target) == 4 for _, target in batches)
+            seen.update(torch.cat([target for _, target in batches]).tolist())
+
+        assert seen == set(range(10))
+        assert len(DeviceDataLoader(dataset, batch_size=16, drop_last=True)) == 1
+
+    @pytest.mark.parametrize("device", [
+        "cpu",
+        pytest.param("cuda", marks=pytest.mark.skipif(not torch.cuda.is_available(), reason="needs CUDA")),
+    ])
+    def test_device_batches_pass_resident_batches_through(self, device, monkeypatch):
+        """Test device_batches normalizes resident batches without a side-stream copy"""
+        from torch.utils.data import TensorDataset
+        from src.data_preprocessing import DeviceDataLoader
+        import src.model as model_module
+        images = rng.integers(0, 256, (6, 3, 8, 8), dtype=np.uint8)
+        dataset = TensorDataset(torch.from_numpy(images), torch.arange(6))
+        loader = DeviceDataLoader(dataset, batch_size=4, device=device)
+        # Resident batches must never be handed to the copy stream; the
+        # unindexed 'cuda' device has to match the loader's 'cuda:0' tensors
+        monkeypatch.setattr(model_module.torch.cuda, "Event", None)
+
+        batches = list(model_module.device_batches(loader, device))
+
+        assert len(batches) == 2
+        data = torch.cat([data for data, _ in batches])
+        target = torch.cat([target for _, target in batches])
+        assert data.dtype == torch.float32
+        assert data.device.type == torch.device(device).type
+        expected = model_module.to_model_input(dataset.tensors[0], device)
+        assert torch.allclose(data, expected)
+        assert torch.equal(target.cpu(), torch.arange(6))
+
+
+class TestProcessedData:
+    """Test saving and loading processed arrays"""
+
+    def test_save_load_roundtrip(self, tmp_path):
+        """Test saved arrays load back memory-mapped and unchanged"""
+        data = rng.random((16, 8)).astype(np.float32)
+        filepath = str(tmp_path / "processed" / "data.npy")
+
+        save_processed_data(data, filepath)
+        loaded = load_processed_data(filepath)
+
+        assert isinstance(loaded, np.memmap)
+        assert np.array_equal(loaded, data)
+
+    def test_save_rejects_object_arrays(self, tmp_path):
+        """Test object arrays are not pickled"""
+        with pytest.raises(ValueError):
+            save_processed_data(np.array([{}], dtype=object), str(tmp_path / "data.npy"))
+
+
+@pytest.fixture(scope="module")
+def edge_case_batch(tmp_path_factory):
+    """Out-of-range pixel images (clipped for saving): their paths and one batched preprocessing call"""
+    from PIL import Image
+    from src.data_preprocessing import preprocess_images_batch
+    images = [
+        rng.integers(-100, 100, (128, 128, 3), dtype=np.int32),  # negative values
+        rng.random((128, 128, 3)) * 1000,                       # large values
+    ]
+    img_dir = tmp_path_factory.mktemp("edge_cases")
+    paths = []
+    for i, image in enumerate(images):
+        path = img_dir / f"edge{i}.jpg"
+        Image.fromarray(np.clip(image, 0, 255).astype(np.uint8)).save(path)
+        paths.append(str(path))
+    return paths, preprocess_images_batch(paths)
+
+
 class TestEdgeCases:
     """Test edge cases and error handling"""
     
-    def test_negative_values(self, tmp_path):
-        """Test preprocessing with negative values"""
-        from PIL import Image
-        import numpy as np
-        # Create an image with negative values, clip to valid range for saving
-        image = np.random.randint(-100, 100, (128, 128, 3), dtype=np.int32)
-        image = np.clip(image, 0, 255).astype(np.uint8)
-        img = Image.fromarray(image)
-        img_path = tmp_path / "neg_test.jpg"
-        img.save(img_path)
-        result = preprocess_image(str(img_path))
-        assert result.shape == (1, 3, 128, 128)
-    
-    def test_large_values(self, tmp_path):
-        """Test preprocessing with large values"""
-        from PIL import Image
-        import numpy as np
-        # Create an image with large values, clip to valid range for saving
-        image = np.random.rand(128, 128, 3) * 1000
-        image = np.clip(image, 0, 255).astype(np.uint8)
-        img = Image.fromarray(image)
-        img_path = tmp_path / "large_test.jpg"
-        img.save(img_path)
-        result = preprocess_image(str(img_path))
+    @pytest.mark.parametrize("index", [0, 1], ids=["negative_values", "large_values"])
+    def test_edge_case_batch(self, edge_case_batch, index):
+        """Test preprocessing of images built from negative or large values, single and batched"""
+        paths, batch = edge_case_batch
+        result = preprocess_image(paths[index])
         assert result.shape == (1, 3, 128, 128)
+        assert torch.isfinite(result).all()
+        assert torch.allclose(batch[index:index + 1], result, atol=1e-5)
     
     def test_normalize_small_range(self):
         """Test normalization with very small value range"""